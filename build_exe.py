@@ -6,19 +6,31 @@ Requirements:
     pip install pyinstaller sounddevice numpy pystray pillow
 
 Usage:
-    python build_exe.py
+    python build_exe.py                    # folder mode, slim profile
+    python build_exe.py --onefile          # single executable
+    python build_exe.py --profile full     # no excludes (everything PyInstaller finds)
 
 Output:
     dist/MicFckinBoost/MicFckinBoost.exe   (folder mode — recommended, fast startup)
+    dist/MicFckinBoost.exe                 (--onefile)
+    (no .exe suffix on Linux / macOS)
+
+The slim profile leaves out modules the app never imports: PIL image
+plugins other than PNG/ICO/BMP (the tray icon is a PNG; pystray on Windows
+converts it through ICO/BMP), numpy's tests, f2py and distutils, and
+stdlib tooling such as pydoc, doctest and the test suite.
+build_measure.py builds both modes and compares size and cold start.
 
 Folder structure expected:
     ├── assets/
     │   ├── app-icon.ico
     │   └── app-icon.png
     ├── build_exe.py
+    ├── micboost/
     └── mic_booster_pro.py
 """
 
+import argparse
 import subprocess
 import sys
 import os
@@ -27,36 +39,76 @@ import os
 APP_NAME  = "MicFckinBoost"
 SCRIPT    = "mic_booster_pro.py"
 ONE_FILE  = False   # False = folder mode (recommended), True = single .exe
-
-# ── Main ──────────────────────────────────────────────────────────────────────
-def main():
+PROFILE   = "slim"  # "slim" = EXCLUDES applied, "full" = no excludes
+
+PIL_KEEP_PLUGINS = ("PngImagePlugin", "IcoImagePlugin", "BmpImagePlugin")
+PIL_PLUGINS = (
+    "BlpImagePlugin", "BufrStubImagePlugin", "CurImagePlugin", "DcxImagePlugin",
+    "DdsImagePlugin", "EpsImagePlugin", "FitsImagePlugin", "FliImagePlugin",
+    "FpxImagePlugin", "FtexImagePlugin", "GbrImagePlugin", "GifImagePlugin",
+    "GribStubImagePlugin", "Hdf5StubImagePlugin", "IcnsImagePlugin", "ImImagePlugin",
+    "ImtImagePlugin", "IptcImagePlugin", "Jpeg2KImagePlugin", "JpegImagePlugin",
+    "McIdasImagePlugin", "MicImagePlugin", "MpegImagePlugin", "MpoImagePlugin",
+    "MspImagePlugin", "PalmImagePlugin", "PcdImagePlugin", "PcxImagePlugin",
+    "PdfImagePlugin", "PixarImagePlugin", "PpmImagePlugin", "PsdImagePlugin",
+    "QoiImagePlugin", "SgiImagePlugin", "SpiderImagePlugin", "SunImagePlugin",
+    "TgaImagePlugin", "TiffImagePlugin", "WebPImagePlugin", "WmfImagePlugin",
+    "XVThumbImagePlugin", "XbmImagePlugin", "XpmImagePlugin",
+)
+EXCLUDES = [f"PIL.{name}" for name in PIL_PLUGINS if name not in PIL_KEEP_PLUGINS] + [
+    "PIL.ImageQt", "PIL.ImageTk", "PIL.ImageShow", "PIL.ImageCms", "PIL.ImageMath",
+    "numpy.f2py", "numpy.distutils", "numpy.tests", "numpy.core.tests",
+    "numpy.lib.tests", "numpy.linalg.tests", "numpy.fft.tests", "numpy.random.tests",
+    "numpy.ma.tests", "numpy.polynomial.tests", "numpy.typing",
+    "pydoc", "doctest", "test", "tkinter.test", "lib2to3", "idlelib", "turtledemo",
+    "setuptools", "pkg_resources", "distutils",
+    "yaml",             # only numpy.show_config() reaches for it
+]
+
+# ── Build ─────────────────────────────────────────────────────────────────────
+def artifact_path(distpath, one_file, name=APP_NAME):
+    """Path of the built executable inside distpath."""
+    exe = name + (".exe" if sys.platform == "win32" else "")
+    return os.path.join(distpath, exe) if one_file else os.path.join(distpath, name, exe)
+
+def build(one_file=ONE_FILE, profile=PROFILE, distpath=None, workpath=None, name=APP_NAME):
+    """Run PyInstaller; returns the executable path, or None if the build failed."""
     here        = os.path.dirname(os.path.abspath(__file__))
     script_path = os.path.join(here, SCRIPT)
     assets_dir  = os.path.join(here, "assets")
     ico_path    = os.path.join(assets_dir, "app-icon.ico")
     png_path    = os.path.join(assets_dir, "app-icon.png")
+    distpath    = distpath or os.path.join(here, "dist")
 
     if not os.path.exists(script_path):
         print(f"[ERROR] {SCRIPT} not found in {here}")
-        sys.exit(1)
+        return None
 
     cmd = [
         sys.executable, "-m", "PyInstaller",
-        "--name", APP_NAME,
+        "--name", name,
         "--noconsole",
         "--clean",
         "--noconfirm",
+        "--distpath", distpath,
     ]
+    if workpath:
+        cmd += ["--workpath", workpath, "--specpath", workpath]
 
-    if ONE_FILE:
+    if one_file:
         cmd.append("--onefile")
     else:
         cmd.append("--onedir")
 
+    if profile == "slim":
+        for mod in EXCLUDES:
+            cmd += ["--exclude-module", mod]
+        print(f"[INFO] Slim profile: excluding {len(EXCLUDES)} modules")
+
     # Bundle entire assets/ folder so resource_path("assets/...") works at runtime
     if os.path.isdir(assets_dir):
-        # Syntax: src;dest_folder  (Windows semicolon)
-        cmd += ["--add-data", f"{assets_dir};assets"]
+        # Syntax: src<sep>dest_folder  (";" on Windows, ":" elsewhere)
+        cmd += ["--add-data", f"{assets_dir}{os.pathsep}assets"]
         print(f"[INFO] Bundling assets/ folder")
     else:
         print(f"[WARN] assets/ folder not found — building without icons")
@@ -77,15 +129,10 @@ def main():
 
     print(f"\n[BUILD] Running PyInstaller...\n")
     result = subprocess.run(cmd, cwd=here)
-
-    if result.returncode == 0:
-        out = os.path.join(here, "dist", APP_NAME)
-        exe = os.path.join(out, APP_NAME + ".exe")
-        print(f"\n[OK] Build complete!")
-        print(f"     EXE → {exe}")
-    else:
+    if result.returncode != 0:
         print("\n[FAIL] PyInstaller exited with errors.")
-        sys.exit(result.returncode)
+        return None
+    return artifact_path(distpath, one_file, name)
 
 
 def _make_ico(png_path, ico_path):
@@ -101,6 +148,21 @@ def _make_ico(png_path, ico_path):
     except Exception as e:
         print(f"[WARN] Could not create .ico: {e}")
 
+# ── Main ──────────────────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=f"build {APP_NAME} with PyInstaller")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--onefile", dest="one_file", action="store_true", default=ONE_FILE)
+    mode.add_argument("--onedir", dest="one_file", action="store_false")
+    parser.add_argument("--profile", choices=("slim", "full"), default=PROFILE)
+    args = parser.parse_args()
+
+    exe = build(args.one_file, args.profile)
+    if exe is None:
+        sys.exit(1)
+    print(f"\n[OK] Build complete!")
+    print(f"     EXE → {exe}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,123 @@
+# build_measure.py
+"""
+build_measure.py — Compare frozen builds: bundle size and cold start
+====================================================================
+Builds the app with build_exe.py in folder mode (onedir) and single-file
+mode (onefile), then measures each one:
+
+    size        bytes on disk of the onedir folder / the onefile executable
+    cold start  wall time of `<exe> --import-only`: bootloader, onefile
+                unpacking, interpreter start and every startup import, then
+                exit before a window or stream is opened (so no display or
+                audio device is needed)
+
+Works with PyInstaller on Windows, Linux and macOS.
+
+Usage:
+    python build_measure.py                     # slim profile, both modes
+    python build_measure.py --profile both      # also the unpruned baseline
+    python build_measure.py --runs 10 --skip-build
+
+Builds go to build-measure/<profile>-<mode>/ next to this script.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from build_exe import APP_NAME, artifact_path, build
+
+# ── Config ────────────────────────────────────────────────────────────────────
+OUT_DIR = "build-measure"
+RUNS    = 5         # the first run is a warm-up and not counted
+MODES   = ("onedir", "onefile")
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+def bundle_size(path):
+    """Bytes on disk of a file, or of everything under a folder."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            fp = os.path.join(root, name)
+            if not os.path.islink(fp):
+                total += os.path.getsize(fp)
+    return total
+
+def cold_start(exe, runs, args=("--import-only",)):
+    """Median wall time in ms of running exe with args, after one warm-up run."""
+    times = []
+    for i in range(runs + 1):
+        t0 = time.perf_counter()
+        proc = subprocess.run([exe, *args], capture_output=True, timeout=120)
+        ms = (time.perf_counter() - t0) * 1000.0
+        if proc.returncode != 0:
+            raise RuntimeError(f"{exe} exited with {proc.returncode}: "
+                               f"{proc.stderr.decode(errors='replace')[-300:]}")
+        if i:
+            times.append(ms)
+    return statistics.median(times), min(times)
+
+def _mb(n):
+    return f"{n / (1024 * 1024):7.1f} MB"
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+def _positive(kind):
+    """argparse type: a finite number of type kind above zero."""
+    def parse(v):
+        try:
+            x = kind(v)
+        except ValueError:
+            x = 0
+        if not 0 < x < float("inf"):
+            raise argparse.ArgumentTypeError(f"expected a number above 0, got {v!r}")
+        return x
+    return parse
+
+def main():
+    parser = argparse.ArgumentParser(description="build onedir/onefile and compare them")
+    parser.add_argument("--profile", choices=("slim", "full", "both"), default="slim")
+    parser.add_argument("--runs", type=_positive(int), default=RUNS)
+    parser.add_argument("--skip-build", action="store_true",
+                        help="measure the builds already in build-measure/")
+    args = parser.parse_args()
+
+    here     = os.path.dirname(os.path.abspath(__file__))
+    profiles = ("full", "slim") if args.profile == "both" else (args.profile,)
+    results  = []
+    for profile in profiles:
+        for mode in MODES:
+            one_file = mode == "onefile"
+            tag      = f"{profile}-{mode}"
+            dist     = os.path.join(here, OUT_DIR, tag)
+            exe      = artifact_path(dist, one_file)
+            if not args.skip_build:
+                shutil.rmtree(dist, ignore_errors=True)
+                work = os.path.join(here, OUT_DIR, "work", tag)
+                print(f"[measure] building {tag}")
+                if build(one_file, profile, distpath=dist, workpath=work) is None:
+                    return 1
+            if not os.path.exists(exe):
+                print(f"[measure] {tag}: {exe} not found")
+                return 1
+            size = bundle_size(exe if one_file else os.path.dirname(exe))
+            try:
+                median, best = cold_start(exe, args.runs)
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                print(f"[measure] {tag}: {e}")
+                return 1
+            results.append((tag, size, median, best))
+
+    print(f"\n[measure] {APP_NAME} on {sys.platform}, cold start over {args.runs} runs")
+    print(f"  {'build':<14} {'size':>10}  {'median':>9}  {'best':>9}")
+    for tag, size, median, best in results:
+        print(f"  {tag:<14} {_mb(size)}  {median:6.0f} ms  {best:6.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
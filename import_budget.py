@@ -0,0 +1,130 @@
+# import_budget.py
+"""
+import_budget.py — Startup import-time budget
+=============================================
+Runs the app with `python -X importtime ... --import-only` (it exits as soon
+as its startup imports are done), sums the import time of the top-level
+modules and fails when a target goes over its budget or imports something
+that must stay lazy (pystray, PIL and soundfile are loaded on first use).
+
+Usage:
+    python import_budget.py                 # check both targets
+    python import_budget.py headless        # one target
+    python import_budget.py --scale 2       # slower machine / CI runner
+    python import_budget.py --top 20        # list more of the heaviest imports
+
+Exit code 1 means a regression: add the import lazily, or raise the budget
+in BUDGETS_MS on purpose.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# ── Config ────────────────────────────────────────────────────────────────────
+SCRIPT  = "mic_booster_pro.py"
+RUNS    = 5        # median of this many cold-ish runs
+TOP     = 8        # heaviest imports listed per target
+
+BUDGETS_MS = {     # median total import time, milliseconds
+    "gui":      450,
+    "headless": 300,
+}
+ARGS = {
+    "gui":      ["--import-only"],
+    "headless": ["--headless", "--import-only"],
+}
+FORBIDDEN = {      # modules a target must not import at startup
+    "gui":      ("pystray", "PIL", "soundfile"),
+    "headless": ("tkinter", "pystray", "PIL", "soundfile"),
+}
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+def parse_importtime(stderr):
+    """{module: (self_us, cumulative_us, depth)} from -X importtime output."""
+    mods = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|")
+            depth = (len(name) - len(name.lstrip())) // 2
+            mods[name.strip()] = (int(self_us), int(cum_us), depth)
+        except ValueError:
+            continue
+    return mods
+
+def measure(target, here):
+    cmd = [sys.executable, "-X", "importtime", os.path.join(here, SCRIPT)] + ARGS[target]
+    proc = subprocess.run(cmd, cwd=here, capture_output=True, text=True, timeout=120)
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.splitlines()[-5:])
+        raise RuntimeError(f"{target}: exited with {proc.returncode}\n{tail}")
+    mods = parse_importtime(proc.stderr)
+    # Top-level entries (depth 0) are disjoint, so their cumulative times add up.
+    total_ms = sum(cum for _, cum, depth in mods.values() if depth == 0) / 1000.0
+    return total_ms, mods
+
+def check(target, here, runs, scale, top):
+    totals, mods = [], {}
+    for _ in range(runs):
+        total, mods = measure(target, here)
+        totals.append(total)
+    median = statistics.median(totals)
+    budget = BUDGETS_MS[target] * scale
+    ok     = median <= budget
+    print(f"[budget] {target}: {median:.0f} ms median of {runs} "
+          f"(budget {budget:.0f} ms) — {'OK' if ok else 'OVER'}")
+
+    heavy = sorted(((cum, name) for name, (_, cum, depth) in mods.items() if depth == 0),
+                   reverse=True)[:top]
+    for cum, name in heavy:
+        print(f"[budget]   {cum / 1000.0:7.1f} ms  {name}")
+
+    leaked = sorted(name for name in mods
+                    if name.split(".")[0] in FORBIDDEN[target])
+    if leaked:
+        ok = False
+        print(f"[budget] {target}: must not import at startup: {', '.join(leaked[:10])}")
+    return ok
+
+# ── Main ──────────────────────────────────────────────────────────────────────
+def _positive(kind):
+    """argparse type: a finite number of type kind above zero."""
+    def parse(v):
+        try:
+            x = kind(v)
+        except ValueError:
+            x = 0
+        if not 0 < x < float("inf"):
+            raise argparse.ArgumentTypeError(f"expected a number above 0, got {v!r}")
+        return x
+    return parse
+
+def main():
+    parser = argparse.ArgumentParser(description="fail when startup imports regress")
+    parser.add_argument("targets", nargs="*",
+                        help=f"targets to check: {', '.join(sorted(BUDGETS_MS))} (default: all)")
+    parser.add_argument("--runs", type=_positive(int), default=RUNS)
+    parser.add_argument("--scale", type=_positive(float), default=1.0,
+                        help="multiply every budget (slow machines)")
+    parser.add_argument("--top", type=int, default=TOP)
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(BUDGETS_MS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    ok = True
+    for target in args.targets or sorted(BUDGETS_MS):
+        try:
+            ok = check(target, here, args.runs, args.scale, args.top) and ok
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"[budget] {e}")
+            ok = False
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,47 @@
-import sounddevice as sd
+import sys
+import time
+
+_BOOT_T0 = time.perf_counter()
+
+_IMPORT_ONLY = "--import-only" in sys.argv[1:]   # import_budget.py: stop after startup imports
+
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # Engine only: tkinter, pystray and PIL are never imported.
+    from micboost.headless import main
+    if _IMPORT_ONLY:
+        sys.exit(0)
+    sys.exit(main(sys.argv[1:], t0=_BOOT_T0))
+
 import numpy as np
 import tkinter as tk
 from tkinter import ttk
 from threading import Thread
 import math
-import sys
 import os
-import json
 import queue
 
-import pystray
-from PIL import Image, ImageDraw
+from micboost import engine
+from micboost.dsp import RAGE_GAIN, slider_to_gain
+from micboost.engine import (
+    REC_FORMATS, REPLAY_SECONDS,
+    add_extra_input, add_extra_output, add_file_input, calibrate_latency,
+    find_best_output, get_clean_devices, input_choices, load_settings,
+    monitor_latency_ms, reconnect_audio, recorder_stats, recording, remove_extra,
+    request_device_switch, restart_sidetone, retarget_extra, save_replay,
+    start_device_watcher, start_monitor, start_recording, start_settings_watcher,
+    stop_monitor, stop_recording,
+)
+
+if __name__ == "__main__" and _IMPORT_ONLY:
+    sys.exit(0)
 
 # ─── State ───────────────────────────────────────────────────────────────────
-gain_value      = 1.0
-running         = False
-monitoring      = False
-audio_thread    = None
-monitor_thread  = None
-input_device    = None
-output_device   = None
-monitor_device  = None
-monitor_queue   = queue.Queue(maxsize=20)
 viz_queue       = queue.Queue(maxsize=10)
-rage_mode       = False          # ← NEW: RAGE MODE flag
+engine.viz_queue = viz_queue
+
+# Audio starts from settings.json now, on its own thread, while the widgets
+# below are built; the dropdowns are filled from the same device scan.
+_boot = engine.start_from_settings(load_settings())
 
 tray_icon  = None
 app_hidden = False
@@ -39,6 +57,7 @@ FG         = "#e8e8f0"
 FG_DIM     = "#6b6b80"
 RED        = "#ff4466"
 GREEN      = "#00ff88"
+AMBER      = "#ffb000"
 RAGE_RED   = "#ff1a1a"
 RAGE_DIM   = "#cc0000"
 RAGE_BG    = "#1a0000"
@@ -53,225 +72,130 @@ def resource_path(relative):
         return os.path.join(sys._MEIPASS, relative)
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), relative)
 
-SETTINGS_FILE = os.path.join(
-    os.path.dirname(os.path.abspath(__file__)), "settings.json"
-)
-
 # ─── Settings persistence ─────────────────────────────────────────────────────
-def load_settings():
-    try:
-        with open(SETTINGS_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-def save_settings():
-    try:
-        data = {
-            "input":   input_var.get(),
-            "output":  output_var.get(),
-            "monitor": monitor_var.get(),
-            "gain":    slider.get(),
-        }
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f"[settings] save error: {e}")
-
-# ─── Devices ─────────────────────────────────────────────────────────────────
-API_PRIORITY = ["WASAPI", "MME", "Windows DirectSound", "Windows WDM-KS"]
-_device_index_map = {}
-
-def _api_rank(hostapi_index):
+def current_settings():
+    return {
+        "input":   input_var.get(),
+        "input_files": list(engine.file_inputs.values()),
+        "output":  output_var.get(),
+        "monitor": monitor_var.get(),
+        "gain":    slider.get(),
+        "monitor_gain":  mon_slider.get(),
+        "monitor_tap":   engine.monitor_tap,
+        "sidetone":      sidetone_var.get(),
+        "sidetone_gain": sidetone_slider.get(),
+        "extra_outputs": [{"name": dest["name"], "gain": scale.get()}
+                          for _, _, scale, dest in _output_rows],
+        "record_format": engine.record_format,
+        "input_gain":    in_gain_scale.get(),
+        "input_mute":    engine.input_muted,
+        "extra_inputs":  [{"name": inp["name"], "gain": scale.get(), "mute": inp["muted"]}
+                          for _, _, scale, _, inp in _input_rows],
+        "chains":        [chain.settings() for chain in engine.chains],
+        "profile":       active_profile,
+    }
+
+AUTOSAVE_MS     = 250      # how often the widgets are checked for changes
+_saved_snapshot = None     # current_settings() as last handed to the engine
+
+def save_settings(profiles=None, wait=False):
+    """Persist the UI state; the engine writes it off the Tk thread unless wait."""
+    global _saved_snapshot
+    if not _devices_ready:
+        return                 # dropdowns still say "scanning": nothing to keep yet
+    data = current_settings()
+    _saved_snapshot = dict(data)
+    if profiles is not None:
+        data["profiles"] = profiles
+    engine.save_settings(data, wait=wait)
+
+def _autosave():
+    """Save whenever a widget changed; the engine debounces the writes."""
+    if current_settings() != _saved_snapshot:
+        save_settings()
+    root.after(AUTOSAVE_MS, _autosave)
+
+def on_control_changed(changes):
+    """Mirror a change made through the control API; the engine already has it."""
+    global _mirroring
+    _mirroring = True
     try:
-        api_name = sd.query_hostapis(hostapi_index)["name"]
-        for rank, pref in enumerate(API_PRIORITY):
-            if pref.lower() in api_name.lower():
-                return rank
-        return len(API_PRIORITY)
-    except Exception:
-        return len(API_PRIORITY)
-
-def get_clean_devices():
-    global _device_index_map
-    devices = sd.query_devices()
-    in_candidates  = {}
-    out_candidates = {}
-    for idx, d in enumerate(devices):
-        name = d["name"]
-        if "Mapper" in name or "Primary" in name:
-            continue
-        rank = _api_rank(d["hostapi"])
-        if d["max_input_channels"] > 0:
-            if name not in in_candidates or rank < in_candidates[name][0]:
-                in_candidates[name] = (rank, idx)
-        if d["max_output_channels"] > 0:
-            if name not in out_candidates or rank < out_candidates[name][0]:
-                out_candidates[name] = (rank, idx)
-    _device_index_map = {}
-    for name, (_, idx) in in_candidates.items():
-        _device_index_map.setdefault(name, {})["in"] = idx
-    for name, (_, idx) in out_candidates.items():
-        _device_index_map.setdefault(name, {})["out"] = idx
-    return list(in_candidates.keys()), list(out_candidates.keys())
-
-def resolve_input_index(name):
-    return _device_index_map.get(name, {}).get("in", name)
-
-def resolve_output_index(name):
-    return _device_index_map.get(name, {}).get("out", name)
-
-def find_vbcable(outputs):
-    priorities = [
-        "cable in 16ch",
-        "cable in",
-        "cable",
-        "virtual audio cable",
-        "vb-audio",
-    ]
-    for pat in priorities:
-        for name in outputs:
-            if pat in name.lower():
-                return name
-    return None
-
-def find_best_output(outputs, saved_out=""):
-    if saved_out and saved_out in outputs:
-        return saved_out
-    vb = find_vbcable(outputs)
-    if vb:
-        return vb
-    for name in outputs:
-        nl = name.lower()
-        if any(k in nl for k in ["speaker", "headphone", "headset", "realtek", "audio output"]):
-            return name
-    return outputs[0] if outputs else None
-
-# ─── Audio — main stream ──────────────────────────────────────────────────────
-def audio_callback(indata, outdata, frames, time, status):
-    global gain_value, monitoring
-    if status:
-        print(f"[stream] {status}")
-    boosted = np.clip(indata * gain_value, -1.0, 1.0)
-    outdata[:] = boosted
-    if monitoring:
-        try:
-            monitor_queue.put_nowait(boosted.copy())
-        except queue.Full:
-            pass
-    try:
-        viz_queue.put_nowait(boosted.copy())
-    except queue.Full:
-        pass
-
-def _find_compatible_output(in_idx):
-    try:
-        in_info  = sd.query_devices(in_idx)
-        in_api   = in_info["hostapi"]
-    except Exception:
-        return None
-
-    preferred = resolve_output_index(output_device)
-    candidates = []
-    if preferred is not None and preferred != in_idx:
-        candidates.append(preferred)
-    for name, info in _device_index_map.items():
-        idx = info.get("out")
-        if idx is not None and idx not in candidates and idx != in_idx:
-            candidates.append(idx)
-
-    for out_idx in candidates:
-        try:
-            out_info = sd.query_devices(out_idx)
-            if out_info["hostapi"] == in_api:
-                return out_idx
-        except Exception:
-            continue
-
-    return None
-
-def audio_loop():
-    global running
-    try:
-        in_idx  = resolve_input_index(input_device)
-        out_idx = _find_compatible_output(in_idx)
-        with sd.Stream(
-            device=(in_idx, out_idx),
-            channels=1,
-            samplerate=48000,
-            blocksize=256,
-            dtype="float32",
-            callback=audio_callback,
-        ):
-            while running:
-                sd.sleep(100)
-    except Exception as e:
-        err = str(e)
-        root.after(0, lambda: show_error(err))
-
-# ─── Audio — dedicated monitor OutputStream ───────────────────────────────────
-def monitor_loop():
-    global monitoring, monitor_device
-    dev_name = monitor_device
-    if dev_name is None:
-        return
-    dev = None if dev_name == "System Default" else resolve_output_index(dev_name)
-    try:
-        with sd.OutputStream(
-            device=dev,
-            channels=1,
-            samplerate=48000,
-            blocksize=2048,
-            latency="high",
-            dtype="float32",
-        ) as stream:
-            buf = []
-            buf_frames = 0
-            target_frames = 2048
-            while monitoring:
-                try:
-                    chunk = monitor_queue.get(timeout=0.1)
-                    buf.append(chunk)
-                    buf_frames += len(chunk)
-                    if buf_frames >= target_frames:
-                        combined = np.concatenate(buf, axis=0)
-                        stream.write(combined)
-                        buf = []
-                        buf_frames = 0
-                except queue.Empty:
-                    if buf:
-                        combined = np.concatenate(buf, axis=0)
-                        stream.write(combined)
-                        buf = []
-                        buf_frames = 0
-    except Exception as e:
-        print(f"[monitor] error: {e}")
-
-def start_monitor():
-    global monitor_thread, monitoring
-    while not monitor_queue.empty():
-        try:
-            monitor_queue.get_nowait()
-        except queue.Empty:
-            break
-    monitoring = True
-    monitor_thread = Thread(target=monitor_loop, daemon=True)
-    monitor_thread.start()
-
-def stop_monitor():
-    global monitoring
-    monitoring = False
-
-def show_error(msg):
+        if "slider" in changes:
+            slider.set(changes["slider"])
+        if "rage" in changes and changes["rage"] != _rage_shown:
+            set_rage(changes["rage"])
+    finally:
+        _mirroring = False
+    if "monitoring" in changes:
+        _paint_monitor()
+    if "input" in changes:
+        in_frame._set_by_full(changes["input"])
+        out_frame._set_by_full(changes["output"])
+    if "profile" in changes:
+        apply_profile(changes["profile"])
+    if "chains" in changes:
+        _sync_chain_rows()
+    if "running" in changes:
+        if not engine.running:
+            _paint_monitor()
+        update_tray_tooltip()
+
+def on_settings_changed(cfg):
+    """settings.json was edited by something else: apply it live."""
+    global active_profile, _saved_snapshot
+    active_profile = cfg.get("profile", active_profile)
+    apply_preset(cfg)
+    _saved_snapshot = current_settings()   # don't write the reload straight back
+    refresh_tray_menu()
+    show_message("Settings reloaded from disk", fg=GREEN)
+
+def show_message(msg, fg=FG_DIM):
     short = msg.replace("\n", " ").strip()
     if len(short) > 72:
         short = short[:69] + "…"
-    error_label.config(text=f"⚠  {short}", fg=RED)
+    error_label.config(text=short, fg=fg)
     root.after(8000, lambda: error_label.config(text=""))
-    status_dot.config(fg=FG_DIM, text="●")
-    status_label.config(text="IDLE", fg=FG_DIM)
-    start_btn.config(fg=ACCENT)
-    stop_btn.config(fg=FG_DIM)
+
+def show_error(msg):
+    show_message(f"⚠  {msg}", fg=RED)
+
+def start_latency_calibration():
+    """Measure the selected input/output as a loopback pair (IDLE only)."""
+    if engine.running or engine.monitoring:
+        show_error("Stop audio before measuring latency")
+        return
+    in_name, out_name = input_var.get(), output_var.get()
+    show_message(f"Measuring {in_name[:20]} ↔ {out_name[:20]}…", fg=ACCENT)
+    def worker():
+        try:
+            report = calibrate_latency(in_name, out_name)
+            found_in, found_out = get_clean_devices()
+        except Exception as e:
+            err = str(e)
+            root.after(0, lambda: show_error(err))
+            return
+        best = next(((api, r) for api, r in report if isinstance(r, dict)), None)
+        if best is None:
+            msg = report[0][1] if report else "no host API exposes both devices"
+            root.after(0, lambda: show_error(f"Latency probe failed: {msg}"))
+            return
+        api, r = best
+        msg = (f"Fastest: {api} {r['rtl_ms']:.1f} ms "
+               f"(reported {r['reported_ms']:.1f} ms)")
+        root.after(0, lambda: (on_devices_changed(found_in, found_out),
+                               show_message(msg, fg=GREEN)))
+    Thread(target=worker, daemon=True).start()
+
+STATUS_COLORS = {"LIVE": GREEN, "RECOVERING": AMBER, "IDLE": FG_DIM}
+
+def set_status(state):
+    if state == "LIVE" and not engine.running:
+        return
+    fg = STATUS_COLORS[state]
+    status_dot.config(fg=fg, text="●")
+    status_label.config(text=state, fg=fg)
+    start_btn.config(fg=FG_DIM if engine.running else ACCENT)
+    stop_btn.config(fg=RED if engine.running else FG_DIM)
 
 # ─── Visualizer ───────────────────────────────────────────────────────────────
 VIZ_W        = 420
@@ -303,7 +227,7 @@ _GRAD_RAGE = [
 
 def _lerp_color(frac, grad=None):
     if grad is None:
-        grad = _GRAD_RAGE if rage_mode else _GRAD
+        grad = _GRAD_RAGE if engine.rage_mode else _GRAD
     frac = max(0.0, min(1.0, frac))
     for i in range(len(grad) - 1):
         f0, r0, g0, b0 = grad[i]
@@ -368,7 +292,7 @@ def _draw_visualizer():
     canvas = viz_canvas
 
     # Rage mode: blink canvas background
-    if rage_mode:
+    if engine.rage_mode:
         _rage_blink_state = not _rage_blink_state
         canvas_bg = "#1a0000" if _rage_blink_state else "#0d0000"
         canvas.config(bg=canvas_bg)
@@ -414,112 +338,164 @@ def _draw_visualizer():
     root.after(33, _draw_visualizer)
 
 
-# ─── Gain calculation ─────────────────────────────────────────────────────────
-# NEW RANGE:
-#   Slider  0   → gain 0.0  (mute / volume 0)
-#   Slider  100 → gain 1.0  (unity / normal volume)
-#   Slider  250 → gain 6.0  (max boost, ~+15.6 dB)
-#
-# Formula: gain = (slider_value / 100) ** 1.5  — but we want 0→0, 100→1, 250→6
-# Simpler piecewise:
-#   0..100  : gain = slider / 100           (linear 0→1)
-#   100..250: gain = 1 + ((slider-100)/150) * 5  (linear 1→6)
-
-def slider_to_gain(v):
-    """Convert slider value (0-250) to gain multiplier."""
-    v = float(v)
-    if v <= 0:
-        return 0.0
-    elif v <= 100:
-        return v / 100.0
-    else:
-        # 100→1.0 .. 250→6.0
-        return 1.0 + ((v - 100.0) / 150.0) * 5.0
-
-
 # ─── Logic ────────────────────────────────────────────────────────────────────
+_mirroring = False   # widgets are being set to mirror a parameter set: don't write the engine
+
 def update_gain(val):
-    global gain_value
+    if _rage_shown:
+        return                    # the slider only takes over again when rage ends
+    if not _mirroring:
+        gain = slider_to_gain(float(val))
+        engine.update_params(gain_value=gain, slider_gain=gain)
+    _paint_gain(val)
+
+def _paint_gain(val):
     v = float(val)
-    gain_value = slider_to_gain(v)
+    gain = slider_to_gain(v)
 
     v_int = int(v)
     gain_val_label.config(text=f"{v_int:03d}")
 
-    if gain_value <= 0:
+    if gain <= 0:
         db_str = "-∞ dB"
         gain_val_label.config(fg=FG_DIM)
-    elif gain_value < 1.0:
-        db = round(20 * math.log10(gain_value), 1)
+    elif gain < 1.0:
+        db = round(20 * math.log10(gain), 1)
         db_str = f"{db} dB"
         gain_val_label.config(fg=FG_DIM)
-    elif gain_value == 1.0:
+    elif gain == 1.0:
         db_str = "±0.0 dB"
         gain_val_label.config(fg=GREEN)
     else:
-        db = round(20 * math.log10(gain_value), 1)
+        db = round(20 * math.log10(gain), 1)
         db_str = f"+{db} dB"
         gain_val_label.config(fg=ACCENT)
 
     db_label.config(text=db_str)
 
-def toggle_monitor():
-    global monitor_device
-    if monitoring:
-        stop_monitor()
+def _paint_monitor():
+    if engine.monitoring:
+        was_off = monitor_btn.cget("text").startswith("○")
+        monitor_btn.config(text="● MON  ON", fg=GREEN, bg=SURFACE2,
+                           highlightbackground=GREEN)
+        if was_off:
+            _refresh_monitor_label()
+    else:
         monitor_btn.config(text="○ MON OFF", fg=FG_DIM, bg=SURFACE,
                            highlightbackground=BORDER)
+
+def toggle_monitor():
+    if engine.monitoring:
+        stop_monitor()
     else:
-        monitor_device = monitor_var.get()
+        engine.monitor_device = monitor_var.get()
         start_monitor()
-        monitor_btn.config(text="● MON  ON", fg=GREEN, bg=SURFACE2,
-                           highlightbackground=GREEN)
+    _paint_monitor()
+
+def update_monitor_gain(val):
+    if not _mirroring:
+        engine.update_params(monitor_gain_value=slider_to_gain(val))
+    mon_gain_label.config(text=f"{int(float(val)):03d}")
+
+def toggle_monitor_tap():
+    set_monitor_tap("pre" if tap_btn.cget("text") == "POST" else "post")
+
+def set_monitor_tap(tap):
+    if not _mirroring:
+        engine.update_params(monitor_tap=tap)
+    tap_btn.config(text=tap.upper())
+
+def update_sidetone_gain(val):
+    if not _mirroring:
+        engine.update_params(sidetone_gain=float(val) / 100.0)
+
+def on_sidetone_selected(*_):
+    if _filling_dropdowns:
+        return
+    new = sidetone_var.get()
+    if new != engine.sidetone_device:
+        engine.sidetone_device = new
+        restart_sidetone()
+
+def _refresh_monitor_label():
+    """Show the monitor's current end-to-end buffer latency on its button."""
+    ms = monitor_latency_ms()
+    if ms is None:
+        return
+    monitor_btn.config(text=f"● MON  ON  ·  {ms:.0f} ms")
+    root.after(500, _refresh_monitor_label)
+
+def toggle_recording():
+    if recording():
+        stop_recording()
+    elif start_recording() is None:
+        show_error("Start the audio first" if not engine.running else "Could not start recording")
+        return
+    _refresh_rec_label()
+
+def toggle_record_format():
+    i = REC_FORMATS.index(engine.record_format) if engine.record_format in REC_FORMATS else -1
+    engine.record_format = REC_FORMATS[(i + 1) % len(REC_FORMATS)]
+    rec_fmt_btn.config(text=engine.record_format.upper())
+
+def save_replay_async():
+    """Save the instant-replay buffer off the Tk thread and report the result."""
+    def work():
+        try:
+            path = save_replay()
+        except Exception as e:
+            msg = f"Replay save failed: {e}"
+            root.after(0, lambda: show_error(msg))
+            return
+        if path is None:
+            root.after(0, lambda: show_error("Nothing to replay yet"))
+        else:
+            root.after(0, lambda: show_message(f"Saved {os.path.basename(path)}", fg=GREEN))
+    Thread(target=work, daemon=True).start()
+
+def _refresh_rec_label():
+    """Show recording time, disk throughput and writer backlog while recording."""
+    st = recorder_stats()
+    if st is None:
+        rec_btn.config(text="●  REC", fg=FG_DIM)
+        rec_label.config(text="")
+        return
+    m, sec = divmod(int(st["seconds"]), 60)
+    mbps = "—" if st["disk_mbps"] is None else f"{st['disk_mbps']:.0f} MB/s"
+    rec_btn.config(text=f"■  {m:02d}:{sec:02d}", fg=RED)
+    rec_label.config(text=f"disk {mbps}  ·  backlog {st['backlog_ms']:.0f} ms"
+                          + (f"  ·  dropped {st['dropped_ms']:.0f} ms" if st["dropped_ms"] else ""))
+    root.after(500, _refresh_rec_label)
 
 def start_audio():
-    global running, audio_thread, input_device, output_device
-    if running:
+    if not _devices_ready:
         return
-    input_device  = input_var.get()
-    output_device = output_var.get()
-    running = True
-    audio_thread = Thread(target=audio_loop, daemon=True)
-    audio_thread.start()
-    status_dot.config(fg=GREEN, text="●")
-    status_label.config(text="LIVE", fg=GREEN)
-    start_btn.config(fg=FG_DIM)
-    stop_btn.config(fg=RED)
-    update_tray_tooltip()
+    if engine.start(input_var.get(), output_var.get()):
+        update_tray_tooltip()
 
 def stop_audio():
-    global running
-    running = False
-    stop_monitor()
-    monitor_btn.config(text="○ MON OFF", fg=FG_DIM, bg=SURFACE,
-                       highlightbackground=BORDER)
-    status_dot.config(fg=FG_DIM, text="●")
-    status_label.config(text="IDLE", fg=FG_DIM)
-    start_btn.config(fg=ACCENT)
-    stop_btn.config(fg=FG_DIM)
+    engine.stop()
+    _paint_monitor()
     update_tray_tooltip()
 
 def exit_app(icon=None, item=None):
-    global running, tray_icon
-    save_settings()
-    running = False
-    stop_monitor()
+    save_settings(wait=True)
+    engine.hooks.clear()          # Tk is going away: nothing left to notify
+    engine.stop()
+    engine.stop_chains()
+    stop_recording(wait=True)
     if tray_icon:
         tray_icon.stop()
     root.destroy()
 
 # ─── RAGE MODE ────────────────────────────────────────────────────────────────
-RAGE_GAIN = 800.0   # absurd gain for prank
-
 _rage_blink_job = None
+_rage_shown     = False   # what the rage UI shows; the control API can change engine.rage_mode
 
 def _rage_blink_ui():
     """Blink the rage button itself while rage mode is active."""
     global _rage_blink_job
-    if not rage_mode:
+    if not _rage_shown:
         return
     cur = rage_btn.cget("bg")
     next_bg = RAGE_RED if cur == RAGE_BG else RAGE_BG
@@ -527,12 +503,17 @@ def _rage_blink_ui():
     _rage_blink_job = root.after(400, _rage_blink_ui)
 
 def toggle_rage():
-    global rage_mode, gain_value, _rage_blink_job
-    rage_mode = not rage_mode
+    set_rage(not _rage_shown)
+
+def set_rage(on):
+    global _rage_blink_job, _rage_shown
+    _rage_shown = on
+    if not _mirroring:
+        # RAGE gain while on; the slider's gain again when it ends
+        engine.update_params(rage_mode=on,
+                             gain_value=RAGE_GAIN if on else slider_to_gain(slider.get()))
 
-    if rage_mode:
-        # Store current gain and switch to RAGE gain
-        gain_value = RAGE_GAIN
+    if on:
         # Update UI
         rage_btn.config(
             text="💀 RAGE MODE  ●  ON",
@@ -545,7 +526,7 @@ def toggle_rage():
         slider.state(["disabled"])   # lock slider during rage
         _rage_blink_ui()
         root.configure(bg=RAGE_BG)
-        for w in [header, section, gain_sec, viz_outer, ctrl, autorun_frame]:
+        for w in [header, section, in_hdr, in_mix, gain_sec, viz_outer, ctrl, rec_row, mon_mix, autorun_frame]:
             try:
                 w.config(bg=RAGE_BG)
             except Exception:
@@ -575,15 +556,18 @@ def toggle_rage():
                 child.config(bg=RAGE_BG)
             except Exception:
                 pass
+        for child in mon_mix.winfo_children():
+            try:
+                child.config(bg=RAGE_BG)
+            except Exception:
+                pass
     else:
         # Cancel blink job
         if _rage_blink_job:
             root.after_cancel(_rage_blink_job)
             _rage_blink_job = None
-        # Restore slider-based gain
-        v = slider.get()
-        gain_value = slider_to_gain(v)
-        update_gain(v)
+        # Restore slider-based gain display
+        _paint_gain(slider.get())
         slider.state(["!disabled"])
         # Restore button style
         rage_btn.config(
@@ -594,7 +578,7 @@ def toggle_rage():
         )
         # Restore background
         root.configure(bg=BG)
-        for w in [header, section, gain_sec, viz_outer, ctrl, autorun_frame]:
+        for w in [header, section, in_hdr, in_mix, gain_sec, viz_outer, ctrl, rec_row, mon_mix, autorun_frame]:
             try:
                 w.config(bg=BG)
             except Exception:
@@ -624,10 +608,87 @@ def toggle_rage():
                 child.config(bg=BG)
             except Exception:
                 pass
+        for child in mon_mix.winfo_children():
+            try:
+                child.config(bg=BG)
+            except Exception:
+                pass
 
 
+# ─── Profiles ─────────────────────────────────────────────────────────────────
+active_profile = load_settings().get("profile")
+
+def apply_preset(p):
+    """Apply a profile (or settings) dict to the running app.
+
+    Devices go through the normal hot switch, and only when they differ. The
+    processing parameters are mirrored in the widgets (whose callbacks then
+    leave the engine alone) and swapped into the engine as one set, between
+    two audio blocks. Keys p leaves out keep their current value.
+    """
+    global _mirroring
+    p = {**engine.profile_from_settings(current_settings()), "rage": _rage_shown, **p}
+    if p.get("input") in input_choices():
+        in_frame._set_by_full(p["input"])
+    if p.get("output") in engine.outputs:
+        out_frame._set_by_full(p["output"])
+    mon = p.get("monitor")
+    if mon and mon != monitor_var.get() and (mon == "System Default" or mon in engine.outputs):
+        mon_frame._set_by_full(mon)
+        if engine.monitoring:
+            stop_monitor()
+            engine.monitor_device = mon
+            start_monitor()
+
+    params = engine.compile_params(p)
+    mirroring, _mirroring = _mirroring, True
+    try:
+        slider.set(float(p.get("gain", 100)))
+        if params["rage_mode"] != _rage_shown:
+            set_rage(params["rage_mode"])
+        in_gain_scale.set(float(p.get("input_gain", 100)))
+        in_mute_btn._set_muted(params["input_muted"])
+        mon_slider.set(float(p.get("monitor_gain", 100)))
+        sidetone_slider.set(float(p.get("sidetone_gain", 50)))
+        set_monitor_tap(params["monitor_tap"])
+    finally:
+        _mirroring = mirroring
+    engine.swap_params(params)
+
+def apply_profile(name):
+    global active_profile
+    p = engine.load_profiles().get(name)
+    if p is None:
+        show_error(f"No profile named {name!r}")
+        return
+    active_profile = name
+    apply_preset(p)
+    save_settings()
+    refresh_tray_menu()
+    show_message(f"Profile: {name}", fg=GREEN)
+
+def save_current_as_profile():
+    global active_profile
+    from tkinter import simpledialog
+    name = simpledialog.askstring("Save Profile", "Profile name:",
+                                  initialvalue=active_profile or "", parent=root)
+    if not name or not name.strip():
+        return
+    profile = engine.profile_from_settings(current_settings())
+    profile["rage"] = engine.rage_mode
+    profiles = engine.load_profiles()
+    profiles[name.strip()] = profile
+    active_profile = name.strip()
+    save_settings(profiles)
+    refresh_tray_menu()
+    show_message(f"Saved profile {active_profile}", fg=GREEN)
+
 # ─── Autorun ─────────────────────────────────────────────────────────────────
+AUTORUN_SUPPORTED = sys.platform == "win32"   # HKCU\...\Run only exists on Windows
+
 def set_autorun(enable=True):
+    if not AUTORUN_SUPPORTED:
+        return
     try:
         import winreg
         app_name = "MicFckinBoost"
@@ -650,6 +711,8 @@ def set_autorun(enable=True):
         print(f"Autorun error: {e}")
 
 def is_autorun_enabled():
+    if not AUTORUN_SUPPORTED:
+        return False
     try:
         import winreg
         key = winreg.OpenKey(
@@ -665,9 +728,11 @@ def is_autorun_enabled():
 
 # ─── Tray ────────────────────────────────────────────────────────────────────
 def load_tray_image():
+    from PIL import Image
     icon_path = resource_path(os.path.join("assets", "app-icon.png"))
     if os.path.exists(icon_path):
         return Image.open(icon_path).convert("RGBA").resize((64, 64))
+    from PIL import ImageDraw
     img  = Image.new("RGBA", (64, 64), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     draw.ellipse([4, 4, 60, 60], fill=(0, 229, 255, 255))
@@ -691,20 +756,48 @@ def hide_window():
 
 def update_tray_tooltip():
     if tray_icon:
-        tray_icon.title = f"MicFckinBoost — {'LIVE' if running else 'IDLE'}"
+        tray_icon.title = f"MicFckinBoost — {'LIVE' if engine.running else 'IDLE'}"
+
+def refresh_tray_menu():
+    if tray_icon:
+        tray_icon.update_menu()
 
 def build_tray():
+    """Create the tray icon; runs once the window is up (pystray is slow to import)."""
     global tray_icon
+    import pystray
+
+    def profile_item(name):
+        return pystray.MenuItem(name, lambda i, it: root.after(0, lambda: apply_profile(name)),
+                                checked=lambda item: active_profile == name, radio=True)
+
+    def profile_items():
+        return [profile_item(name) for name in sorted(engine.load_profiles())] + [
+            pystray.Menu.SEPARATOR,
+            pystray.MenuItem("Save Current as Profile…",
+                             lambda i, it: root.after(0, save_current_as_profile)),
+        ]
+
     menu = pystray.Menu(
         pystray.MenuItem("Show / Hide", show_window, default=True),
         pystray.Menu.SEPARATOR,
         pystray.MenuItem("▶  Start", lambda i, it: root.after(0, start_audio)),
         pystray.MenuItem("■  Stop",  lambda i, it: root.after(0, stop_audio)),
+        pystray.MenuItem("●  Record",
+                         lambda i, it: root.after(0, toggle_recording),
+                         checked=lambda item: recording()),
+        pystray.MenuItem(f"⟲  Save Last {REPLAY_SECONDS} s",
+                         lambda i, it: root.after(0, save_replay_async)),
+        pystray.MenuItem("Measure Latency (loopback)",
+                         lambda i, it: root.after(0, start_latency_calibration)),
+        pystray.Menu.SEPARATOR,
+        pystray.MenuItem("Profiles", pystray.Menu(profile_items)),
         pystray.Menu.SEPARATOR,
         pystray.MenuItem(
             "Run at Startup",
             lambda i, it: (set_autorun(not is_autorun_enabled()),),
             checked=lambda item: is_autorun_enabled(),
+            visible=AUTORUN_SUPPORTED,
         ),
         pystray.Menu.SEPARATOR,
         pystray.MenuItem("Exit", exit_app),
@@ -742,21 +835,17 @@ def styled_dropdown(parent, var, options):
     frame = tk.Frame(parent, bg=SURFACE2, highlightbackground=BORDER,
                      highlightthickness=1)
     frame.pack(fill="x", padx=20, pady=3)
-    short     = [o[:42] + "…" if len(o) > 42 else o for o in options]
-    name_map  = dict(zip(short, options))
-    short_var = tk.StringVar(value=short[0] if short else "")
+    name_map  = {}
+    short_var = tk.StringVar()
     def on_change(*_):
         var.set(name_map.get(short_var.get(), short_var.get()))
     short_var.trace_add("write", on_change)
-    var.set(options[0] if options else "")
     def set_by_full(full_name):
         for s, f in name_map.items():
             if f == full_name:
                 short_var.set(s)
                 return
-    frame._set_by_full = set_by_full
-    frame._options     = options
-    menu = tk.OptionMenu(frame, short_var, *short)
+    menu = tk.OptionMenu(frame, short_var, "")
     menu.config(bg=SURFACE2, fg=FG, activebackground=SURFACE,
                 activeforeground=ACCENT, relief="flat", bd=0,
                 highlightthickness=0, font=FONT_LABEL,
@@ -765,6 +854,33 @@ def styled_dropdown(parent, var, options):
                         activeforeground=ACCENT, relief="flat", bd=0,
                         font=FONT_LABEL)
     menu.pack(fill="x", padx=6, pady=4)
+    def set_options(new_options):
+        """Diff the menu against new_options, keeping the pick if it survives."""
+        current = var.get()
+        short   = [o[:42] + "…" if len(o) > 42 else o for o in new_options]
+        name_map.clear()
+        name_map.update(zip(short, new_options))
+        entries = menu["menu"]
+        keep    = set(short)
+        last    = entries.index("end")
+        for i in range(last if last is not None else -1, -1, -1):
+            if entries.entrycget(i, "label") not in keep:
+                entries.delete(i)
+        last    = entries.index("end")
+        present = {entries.entrycget(i, "label")
+                   for i in range(last + 1 if last is not None else 0)}
+        for s in short:
+            if s not in present:
+                entries.add_command(label=s, command=tk._setit(short_var, s))
+        frame._options = new_options
+        if current in new_options:
+            set_by_full(current)
+        else:
+            short_var.set(short[0] if short else "")
+            var.set(new_options[0] if new_options else "")
+    frame._set_by_full = set_by_full
+    frame._set_options = set_options
+    set_options(options)
     return frame
 
 # ── Header ───────────────────────────────────────────────────────────────────
@@ -784,26 +900,284 @@ status_label.pack(side="left", padx=(3, 0))
 mk_divider(root, (4, 12))
 
 # ── Devices ──────────────────────────────────────────────────────────────────
-inputs, outputs = get_clean_devices()
+SCANNING = "Scanning devices…"
+_devices_ready  = False
 section = tk.Frame(root, bg=BG)
 section.pack(fill="x")
 
-mk_label(section, "INPUT", fg=FG_DIM, font=FONT_MONO).pack(anchor="w", padx=20)
+def choose_input_file():
+    """Pick a WAV file and select it as the input."""
+    from tkinter import filedialog
+    path = filedialog.askopenfilename(
+        title="Use audio file as input",
+        filetypes=[("Audio files", "*.wav *.flac *.ogg"), ("All files", "*.*")])
+    if not path:
+        return
+    name = add_file_input(os.path.abspath(path))
+    _fill_device_dropdowns()
+    in_frame._set_by_full(name)
+
+in_hdr = tk.Frame(section, bg=BG)
+in_hdr.pack(fill="x", padx=20)
+mk_label(in_hdr, "INPUT", fg=FG_DIM, font=FONT_MONO).pack(side="left")
+tk.Button(in_hdr, text="+ FILE", command=choose_input_file,
+          fg=FG_DIM, bg=BG, activeforeground=ACCENT, activebackground=BG,
+          relief="flat", bd=0, highlightthickness=0, font=("Consolas", 7),
+          cursor="hand2").pack(side="right")
 input_var = tk.StringVar()
-in_frame  = styled_dropdown(section, input_var, inputs or ["No input found"])
+in_frame  = styled_dropdown(section, input_var, [SCANNING])
+
+def mk_mute_button(parent, muted, on_toggle):
+    """Small MUTE toggle; on_toggle(muted) is called with the new state."""
+    btn = tk.Button(parent, fg=FG_DIM, bg=SURFACE, activeforeground=ACCENT,
+                    activebackground=SURFACE2, relief="flat", bd=0,
+                    highlightbackground=BORDER, highlightthickness=1,
+                    font=("Consolas", 7), padx=4, pady=0, cursor="hand2")
+    def paint():
+        btn.config(text="MUTED" if btn._muted else "MUTE",
+                   fg=RED if btn._muted else FG_DIM)
+    def toggle():
+        btn._muted = not btn._muted
+        paint()
+        on_toggle(btn._muted)
+    def set_muted(m):
+        btn._muted = bool(m)
+        paint()
+        on_toggle(btn._muted)
+    btn._muted = bool(muted)
+    btn._set_muted = set_muted
+    btn.config(command=toggle)
+    paint()
+    return btn
+
+def update_input_gain(val):
+    if not _mirroring:
+        engine.update_params(input_gain=slider_to_gain(val))
+
+def set_input_muted(m):
+    if not _mirroring:
+        engine.update_params(input_muted=m)
+
+in_mix = tk.Frame(section, bg=BG)
+in_mix.pack(fill="x", padx=20, pady=(4, 0))
+mk_label(in_mix, "MIX", fg=FG_DIM, font=("Consolas", 7)).pack(side="left")
+in_gain_scale = ttk.Scale(in_mix, from_=0, to=250, orient="horizontal", length=160,
+                          command=update_input_gain, style="Gain.Horizontal.TScale")
+in_gain_scale.set(100)
+in_gain_scale.pack(side="left", padx=6)
+in_mute_btn = mk_mute_button(in_mix, False, set_input_muted)
+in_mute_btn.pack(side="right")
+
+extra_in_frame = tk.Frame(section, bg=BG)
+extra_in_frame.pack(fill="x")
+_input_rows = []    # (row frame, dropdown frame, gain scale, mute button, input)
+
+def add_input_row(name=None, gain=100, muted=False):
+    """Add an extra input row (dropdown + gain + mute + alignment + remove)."""
+    row = tk.Frame(extra_in_frame, bg=BG)
+    row.pack(fill="x", pady=(4, 0))
+    var = tk.StringVar()
+    dd  = styled_dropdown(row, var, engine.inputs or ["No input found"])
+    if name:
+        dd._set_by_full(name)
+    ctl = tk.Frame(row, bg=BG)
+    ctl.pack(fill="x", padx=20)
+    mk_label(ctl, "GAIN", fg=FG_DIM, font=("Consolas", 7)).pack(side="left")
+    scale = ttk.Scale(ctl, from_=0, to=250, orient="horizontal", length=120,
+                      style="Gain.Horizontal.TScale")
+    scale.set(float(gain))
+    scale.pack(side="left", padx=6)
+    inp = add_extra_input(var.get(), slider_to_gain(gain), muted)
+    def on_gain(v):
+        inp["gain"] = slider_to_gain(v)
+    def on_mute(m):
+        inp["muted"] = m
+    def on_pick(*_):
+        if not _filling_dropdowns and var.get() != inp["name"]:
+            retarget_extra(inp, var.get())
+    scale.config(command=on_gain)
+    var.trace_add("write", on_pick)
+    def remove():
+        remove_extra(inp)
+        _input_rows.remove(entry)
+        row.destroy()
+        _fit_window()
+    tk.Button(ctl, text="✕", command=remove, fg=FG_DIM, bg=BG,
+              activeforeground=RED, activebackground=BG, relief="flat", bd=0,
+              highlightthickness=0, font=("Consolas", 8), cursor="hand2").pack(side="right")
+    mute = mk_mute_button(ctl, muted, on_mute)
+    mute.pack(side="right", padx=4)
+    offset = mk_label(ctl, "", fg=FG_DIM, font=("Consolas", 7))
+    offset.pack(side="right", padx=4)
+    def refresh_offset():
+        if not row.winfo_exists():
+            return
+        if inp["stream"] is None:
+            offset.config(text="—")
+        else:
+            offset.config(text=f"Δ{inp['offset_ms']:+.0f} ms")
+        root.after(1000, refresh_offset)
+    refresh_offset()
+    entry = (row, dd, scale, mute, inp)
+    _input_rows.append(entry)
+    _fit_window()
+
+tk.Button(section, text="+ ADD INPUT", command=add_input_row,
+          fg=FG_DIM, bg=BG, activeforeground=ACCENT, activebackground=BG,
+          relief="flat", bd=0, highlightthickness=0, font=("Consolas", 7),
+          cursor="hand2").pack(anchor="e", padx=20)
 
 tk.Frame(section, bg=BG, height=6).pack()
 
 mk_label(section, "OUTPUT (VB‑CABLE Recommended)", fg=FG_DIM, font=FONT_MONO).pack(anchor="w", padx=20)
 output_var = tk.StringVar()
-out_frame  = styled_dropdown(section, output_var, outputs or ["No output found"])
-
-tk.Frame(section, bg=BG, height=6).pack()
+out_frame  = styled_dropdown(section, output_var, [SCANNING])
+
+extra_frame = tk.Frame(section, bg=BG)
+extra_frame.pack(fill="x")
+_output_rows = []   # (row frame, dropdown frame, gain scale, destination)
+
+def add_output_row(name=None, gain=100):
+    """Add an extra output destination row (dropdown + gain + remove)."""
+    row = tk.Frame(extra_frame, bg=BG)
+    row.pack(fill="x", pady=(4, 0))
+    var = tk.StringVar()
+    dd  = styled_dropdown(row, var, engine.outputs or ["No output found"])
+    if name:
+        dd._set_by_full(name)
+    ctl = tk.Frame(row, bg=BG)
+    ctl.pack(fill="x", padx=20)
+    mk_label(ctl, "GAIN", fg=FG_DIM, font=("Consolas", 7)).pack(side="left")
+    scale = ttk.Scale(ctl, from_=0, to=250, orient="horizontal", length=160,
+                      style="Gain.Horizontal.TScale")
+    scale.set(float(gain))
+    scale.pack(side="left", padx=6)
+    dest = add_extra_output(var.get(), slider_to_gain(gain))
+    def on_gain(v):
+        dest["gain"] = slider_to_gain(v)
+    def on_pick(*_):
+        if not _filling_dropdowns and var.get() != dest["name"]:
+            retarget_extra(dest, var.get())
+    scale.config(command=on_gain)
+    var.trace_add("write", on_pick)
+    def remove():
+        remove_extra(dest)
+        _output_rows.remove(entry)
+        row.destroy()
+        _fit_window()
+    tk.Button(ctl, text="✕", command=remove, fg=FG_DIM, bg=BG,
+              activeforeground=RED, activebackground=BG, relief="flat", bd=0,
+              highlightthickness=0, font=("Consolas", 8), cursor="hand2").pack(side="right")
+    entry = (row, dd, scale, dest)
+    _output_rows.append(entry)
+    _fit_window()
+
+tk.Button(section, text="+ ADD OUTPUT", command=add_output_row,
+          fg=FG_DIM, bg=BG, activeforeground=ACCENT, activebackground=BG,
+          relief="flat", bd=0, highlightthickness=0, font=("Consolas", 7),
+          cursor="hand2").pack(anchor="e", padx=20)
 
 mk_label(section, "MONITOR", fg=FG_DIM, font=FONT_MONO).pack(anchor="w", padx=20)
 monitor_var = tk.StringVar()
-monitor_options = ["System Default"] + (outputs or ["No output found"])
-mon_frame   = styled_dropdown(section, monitor_var, monitor_options)
+mon_frame   = styled_dropdown(section, monitor_var, ["System Default"])
+
+tk.Frame(section, bg=BG, height=6).pack()
+
+mk_label(section, "SIDETONE (monitor only)", fg=FG_DIM, font=FONT_MONO).pack(anchor="w", padx=20)
+sidetone_var = tk.StringVar()
+st_frame     = styled_dropdown(section, sidetone_var, ["None"])
+
+tk.Frame(section, bg=BG, height=6).pack()
+
+mk_label(section, "CHAINS (own input → output)", fg=FG_DIM, font=FONT_MONO).pack(anchor="w", padx=20)
+chain_frame = tk.Frame(section, bg=BG)
+chain_frame.pack(fill="x")
+_chain_rows = []    # (row frame, input dropdown, output dropdown, gain scale, chain)
+
+def add_chain_row(chain=None):
+    """Add an extra chain row (input + output + gain + meter + remove).
+
+    Without a chain, starts a new one on the first input and output.
+    """
+    if chain is None:
+        if not input_choices() or not engine.outputs:
+            return
+        chain = engine.add_chain(input_choices()[0], engine.outputs[0])
+    row = tk.Frame(chain_frame, bg=BG)
+    row.pack(fill="x", pady=(4, 0))
+    in_var, out_var = tk.StringVar(), tk.StringVar()
+    in_dd  = styled_dropdown(row, in_var, input_choices() or ["No input found"])
+    in_dd._set_by_full(chain.input_device)
+    out_dd = styled_dropdown(row, out_var, engine.outputs or ["No output found"])
+    out_dd._set_by_full(chain.output_device)
+    ctl = tk.Frame(row, bg=BG)
+    ctl.pack(fill="x", padx=20)
+    mk_label(ctl, "GAIN", fg=FG_DIM, font=("Consolas", 7)).pack(side="left")
+    scale = ttk.Scale(ctl, from_=0, to=250, orient="horizontal", length=160,
+                      style="Gain.Horizontal.TScale")
+    scale.set(chain.slider)
+    scale.pack(side="left", padx=6)
+    def on_gain(v):
+        chain.set_gain(float(v))
+    def on_pick(*_):
+        pair = (in_var.get(), out_var.get())
+        if _filling_dropdowns or pair == (chain.input_device, chain.output_device):
+            return
+        if pair[0] in input_choices() and pair[1] in engine.outputs:
+            chain.retarget(*pair)
+    scale.config(command=on_gain)
+    in_var.trace_add("write", on_pick)
+    out_var.trace_add("write", on_pick)
+    def remove():
+        engine.remove_chain(chain)
+        _chain_rows.remove(entry)
+        row.destroy()
+        _fit_window()
+    tk.Button(ctl, text="✕", command=remove, fg=FG_DIM, bg=BG,
+              activeforeground=RED, activebackground=BG, relief="flat", bd=0,
+              highlightthickness=0, font=("Consolas", 8), cursor="hand2").pack(side="right")
+    meter = mk_label(ctl, "", fg=FG_DIM, font=("Consolas", 7))
+    meter.pack(side="right", padx=4)
+    def refresh_meter():
+        if not row.winfo_exists():
+            return
+        if chain.first_callback_at() is None:
+            meter.config(text="—", fg=FG_DIM)
+        else:
+            meter.config(text=f"PK {chain.peak:.2f}", fg=RED if chain.peak >= 1.0 else FG_DIM)
+        root.after(250, refresh_meter)
+    refresh_meter()
+    entry = (row, in_dd, out_dd, scale, chain)
+    _chain_rows.append(entry)
+    _fit_window()
+
+def _sync_chain_rows():
+    """Match the chain rows to engine.chains (started from settings.json or
+    changed through the control API)."""
+    global _filling_dropdowns
+    _filling_dropdowns = True
+    try:
+        for entry in list(_chain_rows):
+            row, in_dd, out_dd, scale, chain = entry
+            if chain not in engine.chains:
+                _chain_rows.remove(entry)
+                row.destroy()
+                continue
+            in_dd._set_by_full(chain.input_device)
+            out_dd._set_by_full(chain.output_device)
+            scale.set(chain.slider)
+    finally:
+        _filling_dropdowns = False
+    shown = [entry[4] for entry in _chain_rows]
+    for chain in engine.chains:
+        if chain not in shown:
+            add_chain_row(chain)
+    _fit_window()
+
+tk.Button(section, text="+ ADD CHAIN", command=add_chain_row,
+          fg=FG_DIM, bg=BG, activeforeground=ACCENT, activebackground=BG,
+          relief="flat", bd=0, highlightthickness=0, font=("Consolas", 7),
+          cursor="hand2").pack(anchor="e", padx=20)
 
 mk_divider(root, (14, 8))
 
@@ -892,6 +1266,23 @@ def mk_btn(parent, text, cmd, fg=ACCENT):
 
 start_btn = mk_btn(ctrl, "▶  START", start_audio, fg=ACCENT)
 stop_btn  = mk_btn(ctrl, "■  STOP",  stop_audio,  fg=FG_DIM)
+rec_btn   = mk_btn(ctrl, "●  REC",   toggle_recording, fg=FG_DIM)
+
+rec_row = tk.Frame(root, bg=BG)
+rec_row.pack(fill="x", padx=24, pady=(0, 2))
+rec_label = mk_label(rec_row, "", fg=FG_DIM, font=("Consolas", 7))
+rec_label.pack(side="left")
+rec_fmt_btn = tk.Button(rec_row, text="WAV", command=toggle_record_format,
+                        fg=FG_DIM, bg=SURFACE, activeforeground=ACCENT,
+                        activebackground=SURFACE2, relief="flat", bd=0,
+                        highlightbackground=BORDER, highlightthickness=1,
+                        font=("Consolas", 7), padx=4, pady=0, cursor="hand2")
+rec_fmt_btn.pack(side="right")
+tk.Button(rec_row, text=f"⟲ SAVE LAST {REPLAY_SECONDS}s", command=save_replay_async,
+          fg=FG_DIM, bg=SURFACE, activeforeground=ACCENT,
+          activebackground=SURFACE2, relief="flat", bd=0,
+          highlightbackground=BORDER, highlightthickness=1,
+          font=("Consolas", 7), padx=4, pady=0, cursor="hand2").pack(side="right", padx=4)
 
 monitor_btn = tk.Button(root, text="○ MON OFF", command=toggle_monitor,
                         fg=FG_DIM, bg=SURFACE, activeforeground=GREEN,
@@ -900,6 +1291,27 @@ monitor_btn = tk.Button(root, text="○ MON OFF", command=toggle_monitor,
                         font=FONT_MONO, padx=14, pady=8, cursor="hand2")
 monitor_btn.pack(fill="x", padx=24, pady=(2, 4))
 
+mon_mix = tk.Frame(root, bg=BG)
+mon_mix.pack(fill="x", padx=24, pady=(0, 4))
+mk_label(mon_mix, "MON", fg=FG_DIM, font=FONT_MONO).pack(side="left")
+mon_slider = ttk.Scale(mon_mix, from_=0, to=250, orient="horizontal", length=110,
+                       command=update_monitor_gain, style="Gain.Horizontal.TScale")
+mon_slider.pack(side="left", padx=(6, 2))
+mon_gain_label = mk_label(mon_mix, "100", fg=FG_DIM, font=FONT_MONO)
+mon_gain_label.pack(side="left")
+tap_btn = tk.Button(mon_mix, text="POST", command=toggle_monitor_tap,
+                    fg=FG_DIM, bg=SURFACE, activeforeground=ACCENT,
+                    activebackground=SURFACE2, relief="flat", bd=0,
+                    highlightbackground=BORDER, highlightthickness=1,
+                    font=("Consolas", 8), padx=6, pady=2, cursor="hand2")
+tap_btn.pack(side="left", padx=6)
+sidetone_slider = ttk.Scale(mon_mix, from_=0, to=100, orient="horizontal", length=80,
+                            command=update_sidetone_gain, style="Gain.Horizontal.TScale")
+sidetone_slider.pack(side="right")
+mk_label(mon_mix, "ST", fg=FG_DIM, font=FONT_MONO).pack(side="right", padx=(0, 6))
+mon_slider.set(100)
+sidetone_slider.set(50)
+
 # ── RAGE MODE button ──────────────────────────────────────────────────────────
 mk_divider(root, (4, 4))
 
@@ -936,6 +1348,7 @@ tk.Checkbutton(
     fg=FG_DIM, bg=BG, activeforeground=ACCENT_DIM, activebackground=BG,
     selectcolor=SURFACE2, relief="flat", bd=0, highlightthickness=0, pady=8,
     font=FONT_MONO, cursor="hand2",
+    state="normal" if AUTORUN_SUPPORTED else "disabled",
 ).pack(side="left")
 
 # ── Exit ─────────────────────────────────────────────────────────────────────
@@ -963,18 +1376,42 @@ error_label = tk.Label(root, text="", fg=RED, bg=BG,
                        font=("Consolas", 8), wraplength=420, justify="left")
 error_label.pack(fill="x", padx=20, pady=(0, 8))
 
+# ─── Device scan ─────────────────────────────────────────────────────────────
+def await_boot_scan(on_done):
+    """Hand the boot thread's device scan to on_done on the Tk thread.
+
+    on_done(inputs, outputs, error) is called once the scan has finished or
+    timed out (error then describes the failure and both lists are empty).
+    """
+    if _boot["done"].is_set():
+        on_done(list(engine.inputs), list(engine.outputs), _boot["error"])
+    else:
+        root.after(20, lambda: await_boot_scan(on_done))
+
 # ─── Apply saved / default settings ──────────────────────────────────────────
 def apply_initial_settings():
+    global _filling_dropdowns
     cfg = load_settings()
+    for path in cfg.get("input_files", []):
+        if os.path.isfile(path):
+            add_file_input(path)
+    if engine.file_inputs:
+        _fill_device_dropdowns()
     saved_in = cfg.get("input", "")
-    if saved_in and saved_in in inputs:
-        in_frame._set_by_full(saved_in)
     saved_out = cfg.get("output", "")
-    best_out = find_best_output(outputs, saved_out)
-    if best_out:
-        out_frame._set_by_full(best_out)
+    best_out = find_best_output(engine.outputs, saved_out)
+    # start_from_settings may already run saved_in → best_out: seed both
+    # dropdowns without on_device_selected switching to a half-set pair.
+    _filling_dropdowns = True
+    try:
+        if saved_in and saved_in in input_choices():
+            in_frame._set_by_full(saved_in)
+        if best_out:
+            out_frame._set_by_full(best_out)
+    finally:
+        _filling_dropdowns = False
     saved_mon = cfg.get("monitor", "")
-    if saved_mon and (saved_mon == "System Default" or saved_mon in outputs):
+    if saved_mon and (saved_mon == "System Default" or saved_mon in engine.outputs):
         mon_frame._set_by_full(saved_mon)
     else:
         mon_frame._set_by_full("System Default")
@@ -984,18 +1421,142 @@ def apply_initial_settings():
         update_gain(g)
     except Exception:
         pass
+    try:
+        mon_slider.set(float(cfg.get("monitor_gain", 100)))
+        sidetone_slider.set(float(cfg.get("sidetone_gain", 50)))
+    except Exception:
+        pass
+    if cfg.get("monitor_tap", "post") != engine.monitor_tap:
+        toggle_monitor_tap()
+    saved_st = cfg.get("sidetone", "None")
+    st_frame._set_by_full(saved_st if saved_st in engine.inputs else "None")
+    for extra in cfg.get("extra_outputs", []):
+        if extra.get("name") in engine.outputs:
+            add_output_row(extra["name"], extra.get("gain", 100))
+    try:
+        in_gain_scale.set(float(cfg.get("input_gain", 100)))
+    except Exception:
+        pass
+    in_mute_btn._set_muted(cfg.get("input_mute", False))
+    if cfg.get("record_format") in REC_FORMATS and cfg["record_format"] != engine.record_format:
+        toggle_record_format()
+    for extra in cfg.get("extra_inputs", []):
+        if extra.get("name") in engine.inputs:
+            add_input_row(extra["name"], extra.get("gain", 100), extra.get("mute", False))
+    _sync_chain_rows()      # chains in settings.json were started at boot
+
+_filling_dropdowns = False
+
+def _fill_device_dropdowns():
+    global _filling_dropdowns
+    _filling_dropdowns = True
+    try:
+        in_frame._set_options(input_choices() or ["No input found"])
+        out_frame._set_options(engine.outputs or ["No output found"])
+        mon_frame._set_options(["System Default"] + (engine.outputs or ["No output found"]))
+        st_frame._set_options(["None"] + engine.inputs)
+        for _, dd, _, _ in _output_rows:
+            dd._set_options(engine.outputs or ["No output found"])
+        for _, dd, _, _, _ in _input_rows:
+            dd._set_options(engine.inputs or ["No input found"])
+        for _, in_dd, out_dd, _, _ in _chain_rows:
+            in_dd._set_options(input_choices() or ["No input found"])
+            out_dd._set_options(engine.outputs or ["No output found"])
+    finally:
+        _filling_dropdowns = False
+
+def on_device_selected(*_):
+    """Hot-switch the live stream when the user picks another input/output."""
+    if not engine.running or _filling_dropdowns:
+        return
+    new_in, new_out = input_var.get(), output_var.get()
+    if (new_in, new_out) == (engine.input_device, engine.output_device):
+        return
+    if new_in in input_choices() and new_out in engine.outputs:
+        request_device_switch(new_in, new_out)
+
+input_var.trace_add("write", on_device_selected)
+output_var.trace_add("write", on_device_selected)
+sidetone_var.trace_add("write", on_sidetone_selected)
+
+def on_devices_scanned(found_in, found_out, error):
+    global _devices_ready, _saved_snapshot
+    engine.inputs, engine.outputs = found_in, found_out
+    _fill_device_dropdowns()
+    _devices_ready = True
+    apply_initial_settings()
+    start_device_watcher()
+    _saved_snapshot = current_settings()
+    root.after(AUTOSAVE_MS, _autosave)
+    start_settings_watcher()
+    if error:
+        show_error(error)
+        return
+    if engine.running:
+        # Already started from settings.json while the UI was being built.
+        set_status("LIVE")
+        update_tray_tooltip()
+    else:
+        start_audio()
+
+_lost_devices = set()   # active device names that vanished while LIVE
+
+def on_devices_changed(found_in, found_out):
+    added   = (set(found_in) | set(found_out)) - set(engine.inputs) - set(engine.outputs)
+    removed = (set(engine.inputs) | set(engine.outputs)) - set(found_in) - set(found_out)
+    engine.inputs, engine.outputs = found_in, found_out
+    if not added and not removed:
+        return
+    for name in sorted(added):
+        print(f"[devices] + {name}")
+    for name in sorted(removed):
+        print(f"[devices] - {name}")
+    _fill_device_dropdowns()
+
+    if not engine.running:
+        _lost_devices.clear()
+        return
+    if engine.input_device not in input_choices():
+        _lost_devices.add(engine.input_device)
+    if engine.output_device not in engine.outputs:
+        _lost_devices.add(engine.output_device)
+    if _lost_devices and engine.input_device in input_choices() and engine.output_device in engine.outputs:
+        _lost_devices.clear()
+        in_frame._set_by_full(engine.input_device)
+        out_frame._set_by_full(engine.output_device)
+        print(f"[devices] {engine.input_device} → {engine.output_device} is back, reconnecting")
+        reconnect_audio()
 
-root.after(50, apply_initial_settings)
 
 # ─── Boot ────────────────────────────────────────────────────────────────────
-build_tray()
+engine.hooks.update(
+    status=lambda state: root.after(0, lambda: set_status(state)),
+    error=lambda msg: root.after(0, lambda: show_error(msg)),
+    devices=lambda i, o: root.after(0, lambda: on_devices_changed(i, o)),
+    settings=lambda cfg: root.after(0, lambda: on_settings_changed(cfg)),
+    params=lambda changes: root.after(0, lambda: on_control_changed(changes)),
+)
+_control_spec = load_settings().get("control")   # port or "unix:<path>"; unset = off
+if _control_spec:
+    from micboost import control
+    control.serve(_control_spec)
 
 def _fit_window():
     root.update_idletasks()
     h = root.winfo_reqheight() + 16
     root.geometry(f"460x{h}")
 
+_startup_deadline = time.monotonic() + 30.0
+
+def _report_startup():
+    if engine.first_callback_at() is not None:
+        engine.report_startup("gui", _BOOT_T0)
+    elif time.monotonic() < _startup_deadline:
+        root.after(50, _report_startup)
+
 root.after(80, _fit_window)
+root.after(50, _report_startup)
 root.after(100, _draw_visualizer)
-root.after(200, start_audio)
+root.after(250, build_tray)
+await_boot_scan(on_devices_scanned)
 root.mainloop()
\ No newline at end of file
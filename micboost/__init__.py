@@ -0,0 +1,4 @@
+"""MicFckinBoost processing core, shared by the desktop app and the CLI.
+
+    python -m micboost process in/*.wav -o out/ --gain 160
+"""
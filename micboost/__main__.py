@@ -0,0 +1,192 @@
+"""Command line entry point.
+
+    python -m micboost process in/*.wav -o out/ --gain 160
+    python -m micboost render in.wav -o out.wav --gain 100 --at 2.5=250 --at 5=rage
+    python -m micboost bench --seconds 60
+    python -m micboost headless
+"""
+
+import argparse
+import glob
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from micboost.batch import CHUNK_SECONDS, plan_jobs, process_file
+from micboost.dsp import BLOCK_SIZE, RAGE_GAIN, SAMPLE_RATE, slider_to_gain
+from micboost.render import file_samplerate, render, render_file
+
+def _expand(patterns):
+    # cmd.exe does not expand wildcards, so do it here as well.
+    files = []
+    for pat in patterns:
+        hits = sorted(glob.glob(pat)) if glob.has_magic(pat) else [pat]
+        files += [f for f in hits if os.path.isfile(f)]
+    return files
+
+def cmd_process(args):
+    files = _expand(args.inputs)
+    if not files:
+        print("[process] no input files")
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    planned, refused = plan_jobs(files, args.output, args.format)
+    for src, why in refused:
+        print(f"[process] {src}: skipped, {why}")
+    gain = RAGE_GAIN if args.rage else args.gain
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(planned)))
+    print(f"[process] {len(planned)} file(s), gain ×{gain:.2f}, {jobs} worker(s)")
+
+    t0, audio_s, failed = time.perf_counter(), 0.0, len(refused)
+    def report(src, frames, rate, spent):
+        nonlocal audio_s
+        dur = frames / rate
+        audio_s += dur
+        print(f"[process] {os.path.basename(src)}: {dur:.1f} s in {spent:.2f} s"
+              f" ({dur / max(spent, 1e-9):.0f}× realtime)")
+
+    todo = [(src, dst, gain, args.chunk) for src, dst in planned]
+    if jobs == 1:
+        for item in todo:
+            try:
+                report(*process_file(*item))
+            except Exception as e:
+                failed += 1
+                print(f"[process] {item[0]}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(process_file, *item): item[0] for item in todo}
+            for fut in as_completed(futures):
+                try:
+                    report(*fut.result())
+                except Exception as e:
+                    failed += 1
+                    print(f"[process] {futures[fut]}: {e}")
+
+    wall = time.perf_counter() - t0
+    print(f"[process] done: {audio_s:.1f} s of audio in {wall:.2f} s"
+          f" ({audio_s / max(wall, 1e-9):.0f}× realtime), {failed} failed")
+    return 1 if failed else 0
+
+def _gain_arg(v):
+    """argparse type: slider value 0-250 or 'rage' → linear gain."""
+    if v == "rage":
+        return RAGE_GAIN
+    try:
+        slider = float(v)
+    except ValueError:
+        slider = math.nan
+    if not 0.0 <= slider <= 250.0:
+        raise argparse.ArgumentTypeError(f"expected a slider value 0-250 or 'rage', got {v!r}")
+    return slider_to_gain(slider)
+
+def _event_arg(spec):
+    """argparse type: SECONDS=SLIDER|rage|fade:LEVEL → (seconds, kind, value)."""
+    at, sep, what = spec.partition("=")
+    try:
+        seconds = float(at)
+        if not sep or not 0.0 <= seconds < math.inf:
+            raise ValueError
+        if what.startswith("fade:"):
+            level = float(what[5:])
+            if not 0.0 <= level <= 1.0:
+                raise ValueError
+            return seconds, "fade", level
+        return seconds, "gain", _gain_arg(what)
+    except (ValueError, argparse.ArgumentTypeError):
+        raise argparse.ArgumentTypeError(
+            f"expected SEC=SLIDER (0-250), SEC=rage or SEC=fade:LEVEL (0-1), got {spec!r}")
+
+def _positive(kind):
+    """argparse type: a finite number of type kind above zero."""
+    def parse(v):
+        try:
+            x = kind(v)
+        except ValueError:
+            x = 0
+        if not 0 < x < math.inf:
+            raise argparse.ArgumentTypeError(f"expected a number above 0, got {v!r}")
+        return x
+    return parse
+
+def cmd_render(args):
+    try:
+        rate = file_samplerate(args.input)
+        events = [(int(round(at * rate)), kind, value) for at, kind, value in args.at]
+        frames, rate, spent = render_file(args.input, args.output, gain=args.gain,
+                                          schedule=events)
+    except (RuntimeError, OSError) as e:
+        print(f"[render] {e}")
+        return 1
+    dur = frames / rate
+    print(f"[render] {dur:.1f} s in {spent:.2f} s ({dur / max(spent, 1e-9):.0f}× realtime),"
+          f" {len(events)} scheduled change(s) → {args.output}")
+    return 0
+
+def cmd_bench(args):
+    rate = SAMPLE_RATE
+    n    = max(1, int(args.seconds * rate))
+    data = (np.random.default_rng(0).standard_normal((n, 1)) * 0.1).astype("float32")
+    # A gain change and a fade out/in every second exercise every state path.
+    events = []
+    for k in range(1, int(args.seconds)):
+        events.append((k * rate, "gain", slider_to_gain(100 + 150 * (k % 2))))
+        events.append((k * rate + rate // 2, "fade", float(k % 2)))
+    best = None
+    for _ in range(args.repeat):
+        _, spent = render(data, gain=1.0, schedule=events, samplerate=rate)
+        best = spent if best is None else min(best, spent)
+    blocks = -(-n // BLOCK_SIZE)
+    print(f"[bench] {args.seconds:g} s at {rate} Hz, {blocks} blocks of {BLOCK_SIZE}:"
+          f" {best * 1000:.1f} ms ({args.seconds / max(best, 1e-9):.0f}× realtime,"
+          f" {best / blocks * 1e6:.1f} µs/block, budget {BLOCK_SIZE / rate * 1e6:.0f} µs)")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m micboost")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("process", help="apply the gain/clip chain to audio files")
+    p.add_argument("inputs", nargs="+", help="input files or glob patterns")
+    p.add_argument("-o", "--output", required=True, help="output directory")
+    p.add_argument("--gain", type=_gain_arg, default="100",
+                   help="slider value 0-250 as in the app (default 100 = unity), or 'rage'")
+    p.add_argument("--rage", action="store_true", help="use the RAGE MODE gain")
+    p.add_argument("--format", choices=["wav", "flac", "ogg"],
+                   help="output format (default: same as input)")
+    p.add_argument("-j", "--jobs", type=int, default=0,
+                   help="worker processes (default: one per core)")
+    p.add_argument("--chunk", type=float, default=CHUNK_SECONDS,
+                   help=f"seconds per read/write chunk (default {CHUNK_SECONDS:g})")
+    p.set_defaults(func=cmd_process)
+
+    p = sub.add_parser("render", help="render one file through the block engine")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", required=True, help="output file")
+    p.add_argument("--gain", type=_gain_arg, default="100", help="slider value 0-250 or 'rage'")
+    p.add_argument("--at", type=_event_arg, action="append", default=[], metavar="SEC=CHANGE",
+                   help="scheduled change: SEC=SLIDER, SEC=rage or SEC=fade:LEVEL")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("bench", help="benchmark the block engine on synthetic audio")
+    p.add_argument("--seconds", type=_positive(float), default=60.0)
+    p.add_argument("--repeat", type=_positive(int), default=3)
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("headless", help="run the audio engine without the GUI",
+                       add_help=False)
+    p.set_defaults(func=None)
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["headless"]:
+        from micboost.headless import main as headless_main
+        return headless_main(argv[1:])
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Offline processing of audio files through the same DSP as the live stream."""
+
+import os
+import time
+
+import numpy as np
+
+from micboost.dsp import process_block
+
+try:
+    import soundfile as sf
+except Exception:
+    sf = None
+
+CHUNK_SECONDS = 10.0   # frames read, processed and written per step
+
+def output_path(src, out_dir, fmt=None):
+    name, ext = os.path.splitext(os.path.basename(src))
+    return os.path.join(out_dir, f"{name}.{fmt}" if fmt else name + ext)
+
+def same_file(a, b):
+    """Whether paths a and b name the same file (b may not exist yet)."""
+    if os.path.normcase(os.path.realpath(a)) == os.path.normcase(os.path.realpath(b)):
+        return True
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False             # b does not exist yet
+
+def plan_jobs(files, out_dir, fmt=None):
+    """Pair each input with its output path; returns (jobs, refused).
+
+    jobs is [(src, dst)]. refused is [(src, reason)] for an output that is
+    the input itself (it would be truncated while being read) and for a
+    second input whose output another input already claims (parallel
+    workers would clobber it). An input listed twice is processed once.
+    """
+    jobs, refused, claimed = [], [], {}
+    for src in files:
+        key = os.path.normcase(os.path.realpath(src))
+        dst = output_path(src, out_dir, fmt)
+        out = os.path.normcase(os.path.realpath(dst))
+        if claimed.get(out) == key:
+            continue
+        if same_file(src, dst):
+            refused.append((src, "output would overwrite the input"))
+        elif out in claimed:
+            refused.append((src, f"same output as another input: {dst}"))
+        else:
+            claimed[out] = key
+            jobs.append((src, dst))
+    return jobs, refused
+
+def process_file(src, dst, gain, chunk_seconds=CHUNK_SECONDS):
+    """Stream src through the DSP into dst in fixed-size chunks.
+
+    Memory use is one chunk regardless of file length. Returns
+    (src, frames, samplerate, seconds spent).
+    """
+    if sf is None:
+        raise RuntimeError("soundfile is required: pip install soundfile")
+    t0 = time.perf_counter()
+    with sf.SoundFile(src) as fin:
+        fmt = os.path.splitext(dst)[1][1:].upper() or fin.format
+        subtype = fin.subtype if sf.check_format(fmt, fin.subtype) else None
+        frames = 0
+        with sf.SoundFile(dst, "w", samplerate=fin.samplerate, channels=fin.channels,
+                          format=fmt, subtype=subtype) as fout:
+            buf = np.empty((max(1, int(chunk_seconds * fin.samplerate)), fin.channels),
+                           dtype="float32")
+            while True:
+                block = fin.read(out=buf)
+                if not len(block):
+                    break
+                fout.write(process_block(block, gain, out=block))
+                frames += len(block)
+        rate = fin.samplerate
+    return src, frames, rate, time.perf_counter() - t0
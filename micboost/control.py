@@ -0,0 +1,319 @@
+"""Local control API: JSON over HTTP on 127.0.0.1 or on a Unix socket.
+
+    GET  /status                    state, devices, gain, stats
+    GET  /meters                    output peak / RMS (last METER_MS), chains
+    GET  /devices                   input and output names
+    GET  /profiles                  saved profile names
+    POST /gain     {"slider": 0-250} or {"gain": <linear, up to the slider's max>}
+    POST /rage     {"on": true|false}          (no "on": toggle)
+    POST /monitor  {"on": true|false}          (no "on": toggle)
+    POST /start    /stop
+    POST /device   {"input": name, "output": name}
+    POST /profile  {"name": name}
+    GET  /chains                    extra chains: devices, gain, meters, recoveries
+    POST /chain/add    {"input": name, "output": name, "slider": 0-250}
+    POST /chain        {"index": n, "slider": .., "rage": .., "input": .., "output": ..}
+    POST /chain/remove {"index": n}
+
+Requests are handled on the server's threads and write straight into the
+engine (engine.update_params), so a change lands at the next audio block
+however busy the GUI is; hosts mirror changes through the "params" hook.
+POSTs must be sent as application/json, and TCP requests must name a
+loopback Host, which keeps web pages in a local browser out.
+
+    curl -s localhost:47800/status
+    curl -s -XPOST -H 'Content-Type: application/json' -d '{"slider": 150}' \\
+        localhost:47800/gain
+    curl -s --unix-socket /tmp/micboost.sock http://x/meters
+"""
+
+import json
+import math
+import os
+import socketserver
+import stat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from micboost import engine
+from micboost.dsp import RAGE_GAIN, gain_to_slider, slider_to_gain
+
+DEFAULT_PORT  = 47800
+LOOPBACK      = ("127.0.0.1", "localhost", "[::1]")
+MAX_BODY      = 64 * 1024
+MAX_GAIN      = slider_to_gain(250)    # the top of the GUI slider
+
+# ─── Handlers ─────────────────────────────────────────────────────────────────
+def _flag(body, current):
+    on = body.get("on")
+    if on is None:
+        return not current
+    if not isinstance(on, bool):
+        raise ValueError(f'"on" must be true or false, got {on!r}')
+    return on
+
+def _number(body, key, lo, hi):
+    """body[key] as a float clamped to lo..hi; NaN and infinities are refused."""
+    v = body[key]
+    if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v):
+        raise ValueError(f'"{key}" must be a finite number, got {v!r}')
+    return max(lo, min(hi, float(v)))
+
+def _changed(**changes):
+    engine._emit("params", changes)
+    return {"ok": True, **changes}
+
+def get_status(_):
+    return {
+        "state":          "LIVE" if engine.running else "IDLE",
+        "input":          engine.input_device,
+        "output":         engine.output_device,
+        "monitor_device": engine.monitor_device,
+        "gain":           engine.gain_value,
+        "slider":         round(gain_to_slider(engine.slider_gain), 1),
+        "rage":           engine.rage_mode,
+        "monitoring":     engine.monitoring,
+        "monitor_tap":    engine.monitor_tap,
+        "input_gain":     engine.input_gain,
+        "input_muted":    engine.input_muted,
+        "recording":      engine.recording(),
+        "chains":         [c.settings() for c in engine.chains],
+        "stats": {
+            "start":              engine.start_stats,
+            "recovery":           engine.recovery_stats,
+            "switch":             engine.switch_stats,
+            "recorder":           engine.recorder_stats(),
+            "monitor_latency_ms": engine.monitor_latency_ms(),
+            "peak_rss_mb":        engine.peak_rss_mb(),
+        },
+    }
+
+def get_meters(_):
+    return {"output": engine.meters(),
+            "chains": [{"input": c.input_device, "output": c.output_device,
+                        "peak": c.peak, "rms": c.rms} for c in engine.chains]}
+
+def get_devices(_):
+    return {"inputs": engine.input_choices(), "outputs": engine.outputs}
+
+def get_profiles(_):
+    return {"profiles": sorted(engine.load_profiles())}
+
+def post_gain(body):
+    if "slider" in body:
+        gain = slider_to_gain(_number(body, "slider", 0.0, 250.0))
+    elif "gain" in body:
+        gain = _number(body, "gain", 0.0, MAX_GAIN)
+    else:
+        raise ValueError('expected {"slider": 0-250} or {"gain": <linear>}')
+    if engine.current_params()["rage_mode"]:
+        engine.update_params(slider_gain=gain)          # takes effect when rage ends
+    else:
+        engine.update_params(gain_value=gain, slider_gain=gain)
+    return _changed(slider=round(gain_to_slider(gain), 1))
+
+def post_rage(body):
+    params = engine.current_params()
+    on = _flag(body, params["rage_mode"])
+    if on:
+        engine.update_params(rage_mode=True, gain_value=RAGE_GAIN)
+    elif params["rage_mode"]:
+        engine.update_params(rage_mode=False, gain_value=params["slider_gain"])
+    return _changed(rage=on)
+
+def post_monitor(body):
+    on = _flag(body, engine.monitoring)
+    if on and not engine.monitoring:
+        if not engine.start_monitor():
+            raise ValueError("monitor could not be started")
+    elif not on and engine.monitoring:
+        engine.stop_monitor()
+    return _changed(monitoring=engine.monitoring)
+
+def post_start(_):
+    if engine.input_device is None or engine.output_device is None:
+        raise ValueError("no input/output selected yet")
+    engine.start(engine.input_device, engine.output_device)
+    return _changed(running=engine.running)
+
+def post_stop(_):
+    engine.stop()
+    return _changed(running=engine.running)
+
+def post_device(body):
+    in_name  = body.get("input",  engine.input_device)
+    out_name = body.get("output", engine.output_device)
+    if in_name not in engine.input_choices():
+        raise ValueError(f"unknown input {in_name!r}")
+    if out_name not in engine.outputs:
+        raise ValueError(f"unknown output {out_name!r}")
+    if engine.running:
+        engine.request_device_switch(in_name, out_name)
+    else:
+        engine.input_device, engine.output_device = in_name, out_name
+    return _changed(input=in_name, output=out_name)
+
+def _chain(body):
+    i = body.get("index")
+    if type(i) is not int or not 0 <= i < len(engine.chains):
+        raise ValueError(f"no chain {i!r}; GET /chains lists them")
+    return engine.chains[i]
+
+def _chain_devices(body, in_name, out_name):
+    in_name  = body.get("input",  in_name)
+    out_name = body.get("output", out_name)
+    if in_name not in engine.input_choices():
+        raise ValueError(f"unknown input {in_name!r}")
+    if out_name not in engine.outputs:
+        raise ValueError(f"unknown output {out_name!r}")
+    return in_name, out_name
+
+def get_chains(_):
+    return {"chains": [{"index": i, **c.settings(), "rage": c.rage, "running": c.running,
+                        "peak": c.peak, "rms": c.rms, "recovery": c.recovery_stats}
+                       for i, c in enumerate(engine.chains)]}
+
+def post_chain_add(body):
+    in_name, out_name = _chain_devices(body, None, None)
+    slider = _number(body, "slider", 0.0, 250.0) if "slider" in body else 100.0
+    engine.add_chain(in_name, out_name, slider)
+    return _changed(chains=len(engine.chains))
+
+def post_chain(body):
+    chain = _chain(body)
+    if "slider" in body:
+        chain.set_gain(_number(body, "slider", 0.0, 250.0))
+    if "rage" in body:
+        chain.rage = _flag({"on": body["rage"]}, chain.rage)    # null toggles
+    if "input" in body or "output" in body:
+        chain.retarget(*_chain_devices(body, chain.input_device, chain.output_device))
+    return _changed(chains=len(engine.chains))
+
+def post_chain_remove(body):
+    engine.remove_chain(_chain(body))
+    return _changed(chains=len(engine.chains))
+
+def post_profile(body):
+    name = body.get("name")
+    profile = engine.load_profiles().get(name)
+    if profile is None:
+        raise ValueError(f"no profile named {name!r}")
+    engine.apply_profile(profile)
+    return _changed(profile=name)
+
+ROUTES = {
+    ("GET",  "/status"):        get_status,
+    ("GET",  "/meters"):        get_meters,
+    ("GET",  "/devices"):       get_devices,
+    ("GET",  "/profiles"):      get_profiles,
+    ("POST", "/gain"):          post_gain,
+    ("POST", "/rage"):          post_rage,
+    ("POST", "/monitor"):       post_monitor,
+    ("POST", "/start"):         post_start,
+    ("POST", "/stop"):          post_stop,
+    ("POST", "/device"):        post_device,
+    ("POST", "/profile"):       post_profile,
+    ("GET",  "/chains"):        get_chains,
+    ("POST", "/chain/add"):     post_chain_add,
+    ("POST", "/chain"):         post_chain,
+    ("POST", "/chain/remove"):  post_chain_remove,
+}
+
+# ─── HTTP ─────────────────────────────────────────────────────────────────────
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "micboost-control"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, code, data):
+        payload = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _dispatch(self, method):
+        if self.server.check_host:
+            host = self.headers.get("Host") or ""
+            host = host[:host.find("]") + 1] if host.startswith("[") else host.split(":")[0]
+            if host not in LOOPBACK:
+                return self._reply(403, {"error": "loopback Host required"})
+        route = ROUTES.get((method, self.path.split("?", 1)[0].rstrip("/")))
+        if route is None:
+            return self._reply(404, {"error": f"no route {method} {self.path}"})
+        body = {}
+        if method == "POST":
+            if self.headers.get_content_type() != "application/json":
+                return self._reply(415, {"error": "send Content-Type: application/json"})
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                return self._reply(400, {"error": "bad Content-Length"})
+            if length > MAX_BODY:
+                return self._reply(413, {"error": "body too large"})
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                return self._reply(400, {"error": f"bad JSON: {e}"})
+            if not isinstance(body, dict):
+                return self._reply(400, {"error": "expected a JSON object"})
+        try:
+            self._reply(200, route(body))
+        except (ValueError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+        except Exception as e:
+            self._reply(500, {"error": str(e)})
+
+class _TCPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    check_host     = True
+
+if hasattr(socketserver, "UnixStreamServer"):       # not on Windows
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+        check_host     = False       # browsers cannot reach a Unix socket
+
+        def get_request(self):
+            request, _ = super().get_request()
+            return request, ("unix", 0)   # the handler expects an (address, port) pair
+else:
+    _UnixServer = None
+
+def serve(spec=DEFAULT_PORT):
+    """Start the API in the background; spec is a port or "unix:<path>".
+
+    Returns the server (call .shutdown() to stop it), or None if it could
+    not listen.
+    """
+    spec = str(spec)
+    try:
+        if spec.startswith("unix:"):
+            if _UnixServer is None:
+                raise OSError("Unix sockets are not available here")
+            path = spec[len("unix:"):]
+            if os.path.lexists(path):
+                if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                    raise OSError(f"{path} exists and is not a socket")
+                os.remove(path)             # stale socket from an earlier run
+            server = _UnixServer(path, _Handler)
+            os.chmod(path, 0o600)           # the API is for this user only
+            where  = path
+        else:
+            server = _TCPServer(("127.0.0.1", int(spec)), _Handler)
+            where  = f"http://127.0.0.1:{server.server_address[1]}"
+    except (OSError, ValueError) as e:
+        print(f"[control] cannot listen on {spec}: {e}")
+        return None
+    Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[control] listening on {where}")
+    return server
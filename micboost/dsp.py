@@ -0,0 +1,75 @@
+"""Gain curve and per-block processing used by the live stream and offline tools."""
+
+import numpy as np
+
+# ─── Gain calculation ─────────────────────────────────────────────────────────
+# NEW RANGE:
+#   Slider  0   → gain 0.0  (mute / volume 0)
+#   Slider  100 → gain 1.0  (unity / normal volume)
+#   Slider  250 → gain 6.0  (max boost, ~+15.6 dB)
+#
+# Formula: gain = (slider_value / 100) ** 1.5  — but we want 0→0, 100→1, 250→6
+# Simpler piecewise:
+#   0..100  : gain = slider / 100           (linear 0→1)
+#   100..250: gain = 1 + ((slider-100)/150) * 5  (linear 1→6)
+
+SAMPLE_RATE = 48000
+BLOCK_SIZE  = 256        # frames per callback; the render engine uses the same
+XFADE_MS    = 10.0       # hot-switch crossfade length
+RAGE_GAIN   = 800.0      # absurd gain for prank
+
+def slider_to_gain(v):
+    """Convert slider value (0-250) to gain multiplier."""
+    v = float(v)
+    if v <= 0:
+        return 0.0
+    elif v <= 100:
+        return v / 100.0
+    else:
+        # 100→1.0 .. 250→6.0
+        return 1.0 + ((v - 100.0) / 150.0) * 5.0
+
+def gain_to_slider(g):
+    """Inverse of slider_to_gain, clamped to the slider range."""
+    g = max(0.0, float(g))
+    if g <= 1.0:
+        return g * 100.0
+    return min(250.0, 100.0 + (g - 1.0) / 5.0 * 150.0)
+
+# ─── Block processing ─────────────────────────────────────────────────────────
+def process_block(block, gain, out=None):
+    """Apply gain and hard-clip to ±1. With out given, nothing is allocated."""
+    if out is None:
+        return np.clip(block * gain, -1.0, 1.0)
+    np.multiply(block, gain, out=out)
+    return np.clip(out, -1.0, 1.0, out=out)
+
+def fade_step(samplerate, xfade_ms=XFADE_MS):
+    """Per-sample level change of a crossfade lasting xfade_ms."""
+    return 1000.0 / (xfade_ms * samplerate)
+
+def render_block(src, gain, fade):
+    """One block of the live chain: gain, clip, then the crossfade envelope.
+
+    fade is any dict with "level", "target" and "step" (the stream slot in
+    the app); its level is advanced in place. It also remembers the gain of
+    the last block in "gain": a new gain is ramped to across this block
+    instead of stepping, which would click. Returns a new array.
+    """
+    last = fade.get("gain", gain)
+    fade["gain"] = gain
+    if last != gain:
+        gain = np.linspace(last, gain, len(src), dtype="float32")
+        if src.ndim > 1:
+            gain = gain[:, None]
+    boosted = process_block(src, gain)
+    level, target = fade["level"], fade["target"]
+    if level != target:
+        # Crossfade in progress: ramp this block towards the target level.
+        ramp = level + np.copysign(fade["step"], target - level) * np.arange(1, len(src) + 1)
+        ramp = np.clip(ramp, min(level, target), max(level, target))
+        boosted *= ramp[:, None] if boosted.ndim > 1 else ramp
+        fade["level"] = float(ramp[-1])
+    elif level == 0.0:
+        boosted[:] = 0.0
+    return boosted
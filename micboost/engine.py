@@ -0,0 +1,2233 @@
+"""Audio engine: devices, streams, processing taps, recorder and replay.
+
+Has no GUI dependencies, so it runs under the Tk app, the headless daemon
+or any other host. Hosts set the callbacks in `hooks` to hear about status
+changes, errors and device hot-plug; those arrive on engine threads.
+"""
+
+import atexit
+import importlib.util
+import json
+import math
+import os
+import queue
+import sys
+import tempfile
+import time
+import wave
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from functools import partial
+from threading import Event, Lock, RLock, Thread
+
+import numpy as np
+import sounddevice as sd
+
+from micboost.dsp import (BLOCK_SIZE, RAGE_GAIN, SAMPLE_RATE, fade_step, render_block,
+                          slider_to_gain)
+
+_sf = None                       # soundfile, once _soundfile() has tried to import it
+
+def _soundfile():
+    """The optional soundfile module (FLAC, float WAV), imported on first use."""
+    global _sf
+    if _sf is None:
+        try:
+            import soundfile
+            _sf = soundfile
+        except Exception:
+            _sf = False
+    return _sf or None
+
+# ─── State ───────────────────────────────────────────────────────────────────
+gain_value      = 1.0
+rage_mode       = False
+slider_gain     = 1.0            # gain the host's slider is set to; rage off returns to it
+running         = False
+monitoring      = False
+audio_thread    = None
+input_device    = None
+output_device   = None
+monitor_device  = None
+viz_queue       = None           # the GUI sets a Queue to receive processed blocks
+monitor_gain_value = 1.0         # monitor-only gain, independent of gain_value
+monitor_tap     = "post"         # "pre" = raw mic, "post" = boosted output
+sidetone_device = None           # extra input mixed into the monitor only
+sidetone_gain   = 0.5
+inputs, outputs = [], []         # device names from the last scan
+
+# ─── Paths ───────────────────────────────────────────────────────────────────
+# Frozen builds keep settings and recordings next to the executable, not in
+# PyInstaller's (for onefile, temporary) bundle directory.
+APP_DIR = (os.path.dirname(os.path.abspath(sys.executable)) if getattr(sys, "frozen", False)
+           else os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SETTINGS_FILE = os.path.join(APP_DIR, "settings.json")
+RECORDINGS_DIR = os.path.join(APP_DIR, "recordings")
+
+# ─── Settings persistence ─────────────────────────────────────────────────────
+# Saves are handed to a writer thread that waits for SETTINGS_DEBOUNCE_S of
+# quiet, merges them into the file on disk (keys it was not given survive)
+# and replaces the file atomically, so a crash never leaves half a file. A
+# watcher polls the file and reports edits made by anything else.
+SETTINGS_DEBOUNCE_S     = 0.5
+SETTINGS_WATCH_INTERVAL = 1.0
+
+_settings_lock    = Lock()       # serialises writes against the watcher's stat
+_settings_wake    = Event()
+_settings_pending = None         # (seq, data) waiting for the writer thread
+_settings_seq     = 0            # bumped by every save_settings call
+_settings_written = 0            # seq of the data last written to disk
+_settings_sig     = None         # (mtime, size) of our own last write
+_settings_thread  = None
+
+def _read_settings_file():
+    with open(SETTINGS_FILE, "r") as f:
+        return json.load(f)
+
+def load_settings():
+    try:
+        return _read_settings_file()
+    except Exception:
+        return {}
+
+def _new_file_mode():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+def write_json_atomic(path, data):
+    """Write data as JSON to a temp file next to path, fsync, then rename over path.
+
+    The file keeps the mode of the one it replaces (mkstemp creates 0600);
+    a new file gets the usual 0666 minus the umask.
+    """
+    fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".",
+                               suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        if hasattr(os, "fchmod"):           # not on Windows, where it does not matter
+            try:
+                mode = os.stat(path).st_mode & 0o7777
+            except FileNotFoundError:
+                mode = _new_file_mode()
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def _settings_stat():
+    try:
+        st = os.stat(SETTINGS_FILE)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _write_settings(seq, data):
+    global _settings_written, _settings_sig
+    with _settings_lock:
+        if seq <= _settings_written:
+            return                  # a newer save already reached the disk
+        write_json_atomic(SETTINGS_FILE, {**load_settings(), **data})
+        _settings_written = seq
+        _settings_sig     = _settings_stat()
+
+def _settings_writer_loop():
+    global _settings_pending
+    while True:
+        _settings_wake.wait()
+        while True:                 # debounce: wait until saves stop arriving
+            _settings_wake.clear()
+            if not _settings_wake.wait(SETTINGS_DEBOUNCE_S):
+                break
+        pending, _settings_pending = _settings_pending, None
+        if pending is not None:
+            try:
+                _write_settings(*pending)
+            except Exception as e:
+                print(f"[settings] save error: {e}")
+
+def save_settings(data, wait=False):
+    """Persist data (merged into settings.json) off the calling thread.
+
+    With wait=True the write happens now, on this thread; use it on exit.
+    """
+    global _settings_seq, _settings_pending, _settings_thread
+    _settings_seq += 1
+    if wait:
+        try:
+            _write_settings(_settings_seq, data)
+        except Exception as e:
+            print(f"[settings] save error: {e}")
+        return
+    _settings_pending = (_settings_seq, data)
+    if _settings_thread is None:
+        _settings_thread = Thread(target=_settings_writer_loop, daemon=True)
+        _settings_thread.start()
+    _settings_wake.set()
+
+def settings_watch_loop():
+    last = _settings_stat()
+    while True:
+        time.sleep(SETTINGS_WATCH_INTERVAL)
+        with _settings_lock:
+            sig = _settings_stat()
+            if sig is None or sig == last:
+                continue
+            if sig == _settings_sig:
+                last = sig          # our own write
+                continue
+            try:
+                cfg = _read_settings_file()
+            except Exception:
+                continue            # caught mid-write by another tool: retry next tick
+            last = sig
+        print("[settings] settings.json changed on disk, reloading")
+        _emit("settings", cfg)
+
+def start_settings_watcher():
+    Thread(target=settings_watch_loop, daemon=True).start()
+
+# ─── Host notifications ───────────────────────────────────────────────────────
+hooks = {
+    "status":  None,    # (state) — "LIVE" | "RECOVERING" | "IDLE"
+    "error":   None,    # (message)
+    "devices": None,    # (inputs, outputs) after a hot-plug rescan
+    "settings": None,   # (settings dict) after settings.json was edited externally
+    "params":  None,    # (changes dict) after the control API changed engine state
+}
+
+def _emit(event, *args):
+    fn = hooks.get(event)
+    if fn is not None:
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"[engine] {event} hook failed: {e}")
+
+# ─── Devices ─────────────────────────────────────────────────────────────────
+API_PRIORITY_BY_PLATFORM = {
+    "win32":  ["WASAPI", "MME", "Windows DirectSound", "Windows WDM-KS"],
+    "linux":  ["JACK Audio Connection Kit", "ALSA", "PulseAudio", "OSS"],
+    "darwin": ["Core Audio"],
+}
+API_PRIORITY = API_PRIORITY_BY_PLATFORM.get(sys.platform, API_PRIORITY_BY_PLATFORM["win32"])
+
+# ALSA lists the same card several times: raw hw:, plughw: (format/rate
+# conversion) and the PipeWire / PulseAudio / default plugins that resample
+# on top of it. Prefer the entries with the fewest conversion layers.
+ALSA_NAME_PRIORITY = ["(hw:", "(plughw:", "pipewire", "pulse", "default"]
+ALSA_HIDDEN = ("sysdefault", "front", "surround", "iec958", "spdif", "dmix",
+               "dsnoop", "lavrate", "samplerate", "speexrate", "upmix", "vdownmix")
+DEVICE_SCAN_TIMEOUT = 5.0        # seconds before a hung PortAudio scan is given up
+DEVICE_WATCH_INTERVAL = 3.0      # seconds between hot-plug checks
+DEVICE_REINIT_IDLE_S  = 30.0     # full PortAudio re-init this rarely without a hint
+REINIT_RELEASE_S      = 1.0      # how long chains get to close their streams for one
+_device_index_map = {}
+_device_list      = []           # raw sd.query_devices() result of the last scan
+_hostapi_names    = []
+_portaudio_lock   = Lock()       # serialises PortAudio re-init against stream opens
+
+def _api_rank(api_name):
+    api_name = api_name.lower()
+    for rank, pref in enumerate(API_PRIORITY):
+        if pref.lower() in api_name:
+            return rank
+    return len(API_PRIORITY)
+
+def _alsa_name_rank(name):
+    nl = name.lower()
+    for rank, pref in enumerate(ALSA_NAME_PRIORITY):
+        if pref in nl:
+            return rank
+    return len(ALSA_NAME_PRIORITY)
+
+def _is_hidden_device(name, api_name):
+    if "Mapper" in name or "Primary" in name:
+        return True
+    return "ALSA" in api_name and name.startswith(ALSA_HIDDEN)
+
+def _hostapi_ranks():
+    """Query the host API table once, keep its names and map index → rank."""
+    global _hostapi_names
+    try:
+        hostapis = sd.query_hostapis()
+    except Exception:
+        return {}
+    _hostapi_names = [api["name"] for api in hostapis]
+    rank_by_name = {api["name"]: _api_rank(api["name"]) for api in hostapis}
+    return {idx: rank_by_name[api["name"]] for idx, api in enumerate(hostapis)}
+
+def get_clean_devices(devices=None):
+    global _device_index_map, _device_list
+    if devices is None:
+        devices = sd.query_devices()
+    _device_list = devices
+    ranks   = _hostapi_ranks()
+    worst   = len(API_PRIORITY)
+    in_candidates  = {}
+    out_candidates = {}
+    for idx, d in enumerate(devices):
+        name     = d["name"]
+        api_name = (_hostapi_names[d["hostapi"]]
+                    if d["hostapi"] < len(_hostapi_names) else "")
+        if _is_hidden_device(name, api_name):
+            continue
+        # A measured round trip beats the static host API preference; the
+        # reported default latency of that direction breaks ties between
+        # unmeasured variants (the other direction's value is a placeholder
+        # on input-only and output-only devices).
+        measured = measured_latency(idx)
+        api_rank = ranks.get(d["hostapi"], worst)
+        if d["max_input_channels"] > 0:
+            rank = ((0, measured) if measured is not None
+                    else (1, api_rank, d["default_low_input_latency"]))
+            if name not in in_candidates or rank < in_candidates[name][0]:
+                in_candidates[name] = (rank, idx)
+        if d["max_output_channels"] > 0:
+            rank = ((0, measured) if measured is not None
+                    else (1, api_rank, d["default_low_output_latency"]))
+            if name not in out_candidates or rank < out_candidates[name][0]:
+                out_candidates[name] = (rank, idx)
+    index_map = {}
+    for name, (_, idx) in in_candidates.items():
+        index_map.setdefault(name, {})["in"] = idx
+    for name, (_, idx) in out_candidates.items():
+        index_map.setdefault(name, {})["out"] = idx
+    _device_index_map = index_map
+
+    def order(candidates):
+        # hw: before plugin layers on ALSA; stable, so other APIs keep scan order
+        def key(name):
+            api = _hostapi_names[devices[candidates[name][1]]["hostapi"]]
+            return _alsa_name_rank(name) if "ALSA" in api else len(ALSA_NAME_PRIORITY)
+        return sorted(candidates, key=key) if _hostapi_names else list(candidates)
+    return order(in_candidates), order(out_candidates)
+
+def scan_devices(timeout=DEVICE_SCAN_TIMEOUT):
+    """Enumerate devices into inputs/outputs, giving up after timeout.
+
+    Returns an error string, or None on success. A hung PortAudio scan is
+    left behind on its daemon thread.
+    """
+    global inputs, outputs
+    result = []
+    def worker():
+        try:
+            result.append((*get_clean_devices(), None))
+        except Exception as e:
+            result.append(([], [], str(e)))
+    t = Thread(target=worker, daemon=True)
+    t.start()
+    t.join(timeout)
+    found_in, found_out, err = result[0] if result else (
+        [], [], f"Device scan timed out after {timeout:.0f}s")
+    inputs, outputs = found_in, found_out
+    return err
+
+# ─── Devices — hot-plug watcher ───────────────────────────────────────────────
+def _device_fingerprint(devices):
+    return tuple((d["name"], d["hostapi"],
+                  d["max_input_channels"], d["max_output_channels"])
+                 for d in devices)
+
+_open_streams = 0   # PortAudio streams currently open, guarded by _portaudio_lock
+
+def _streams_idle():
+    return _open_streams == 0
+
+@contextmanager
+def open_stream(factory, **kwargs):
+    """Open and start a PortAudio stream, tracked so re-init never races it."""
+    global _open_streams
+    with _portaudio_lock:
+        stream = factory(**kwargs)
+        _open_streams += 1
+    try:
+        with stream:
+            yield stream
+    finally:
+        with _portaudio_lock:
+            _open_streams -= 1
+
+_reinit_gate = Event()           # set while a re-init waits for chains to close
+
+def _os_device_hint():
+    """Cheap signature of the OS sound device nodes, or None where there is none.
+
+    Linux adds and removes /dev/snd entries as cards come and go, which is
+    reason enough for a full re-init; elsewhere the watcher uses a timer.
+    """
+    try:
+        return tuple(sorted(os.listdir("/dev/snd")))
+    except OSError:
+        return None
+
+def _main_down():
+    """The main stream should be running but is not open (an outage)."""
+    return running and _live_slot is None
+
+def _refresh_portaudio():
+    """Re-initialise PortAudio so it notices hot-plugged devices.
+
+    Re-init invalidates every open stream, so it never runs while the main
+    stream or the monitor is open. The fan-out and mixer streams are closed
+    during an outage; chains are asked to close theirs for the moment it
+    takes and reopen straight after.
+    """
+    if (running and not _main_down()) or _monitor_stack is not None:
+        return False
+    _reinit_gate.set()
+    try:
+        deadline = time.monotonic() + REINIT_RELEASE_S
+        while True:
+            with _portaudio_lock:
+                if _streams_idle():
+                    sd._terminate()
+                    sd._initialize()
+                    return True
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.02)
+    finally:
+        _reinit_gate.clear()
+        for chain in chains:
+            chain._wake.set()
+
+def device_watch_loop():
+    last, last_hint, last_reinit = None, _os_device_hint(), time.monotonic()
+    while True:
+        time.sleep(DEVICE_WATCH_INTERVAL)
+        try:
+            # A full re-init enumerates every device again, which is slow:
+            # do it when the OS hints at a change, on every check while the
+            # main stream is down (its device may be back), else rarely.
+            hint = _os_device_hint()
+            now  = time.monotonic()
+            due  = now - last_reinit >= (DEVICE_WATCH_INTERVAL if _main_down()
+                                         else DEVICE_REINIT_IDLE_S)
+            if (due or hint != last_hint) and _refresh_portaudio():
+                last_hint, last_reinit = hint, now
+            devices = sd.query_devices()
+            fp = _device_fingerprint(devices)
+            if fp == last:
+                continue
+            last = fp
+            found_in, found_out = get_clean_devices(devices)
+            _emit("devices", found_in, found_out)
+        except Exception as e:
+            print(f"[devices] watch error: {e}")
+
+def start_device_watcher():
+    Thread(target=device_watch_loop, daemon=True).start()
+
+def resolve_input_index(name):
+    return _device_index_map.get(name, {}).get("in", name)
+
+def resolve_output_index(name):
+    return _device_index_map.get(name, {}).get("out", name)
+
+def find_vbcable(outputs):
+    priorities = [
+        "cable in 16ch",
+        "cable in",
+        "cable",
+        "virtual audio cable",
+        "vb-audio",
+    ]
+    for pat in priorities:
+        for name in outputs:
+            if pat in name.lower():
+                return name
+    return None
+
+def find_best_output(outputs, saved_out=""):
+    if saved_out and saved_out in outputs:
+        return saved_out
+    vb = find_vbcable(outputs)
+    if vb:
+        return vb
+    for name in outputs:
+        nl = name.lower()
+        if any(k in nl for k in ["speaker", "headphone", "headset", "realtek", "audio output"]):
+            return name
+    return outputs[0] if outputs else None
+
+# ─── Devices — capability cache ───────────────────────────────────────────────
+CAPS_FILE      = os.path.join(os.path.dirname(SETTINGS_FILE), "device_caps.json")
+PROBE_RATES    = [48000, 44100, 96000, 32000, 16000]   # in order of preference
+PROBE_CHANNELS = [1, 2]
+_caps      = None   # fingerprint → capabilities, loaded from CAPS_FILE on first use
+_caps_lock = Lock()
+
+def device_fingerprint(idx):
+    d   = _device_list[idx]
+    api = (_hostapi_names[d["hostapi"]] if d["hostapi"] < len(_hostapi_names)
+           else str(d["hostapi"]))
+    return f"{api}|{d['name']}|{d['max_input_channels']}|{d['max_output_channels']}"
+
+def _load_caps():
+    try:
+        with open(CAPS_FILE, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _save_caps():
+    try:
+        write_json_atomic(CAPS_FILE, _caps)
+    except Exception as e:
+        print(f"[caps] save error: {e}")
+
+def _probe_direction(idx, check, max_ch, d, kind):
+    caps = {"rates": [], "channels": [],
+            "latency": [d[f"default_low_{kind}_latency"], d[f"default_high_{kind}_latency"]]}
+    if max_ch <= 0:
+        return caps
+    for ch in PROBE_CHANNELS:
+        if ch > max_ch:
+            continue
+        try:
+            check(device=idx, channels=ch, samplerate=d["default_samplerate"], dtype="float32")
+            caps["channels"].append(ch)
+        except Exception:
+            pass
+    ch = caps["channels"][0] if caps["channels"] else min(max_ch, 2)
+    for rate in PROBE_RATES:
+        try:
+            check(device=idx, channels=ch, samplerate=rate, dtype="float32")
+            caps["rates"].append(rate)
+        except Exception:
+            pass
+    return caps
+
+def _probe_caps(idx):
+    d = _device_list[idx]
+    with _portaudio_lock:
+        return {
+            "in":  _probe_direction(idx, sd.check_input_settings,
+                                    d["max_input_channels"], d, "input"),
+            "out": _probe_direction(idx, sd.check_output_settings,
+                                    d["max_output_channels"], d, "output"),
+        }
+
+def device_caps(idx):
+    """Capabilities of device idx, probed once per fingerprint and persisted."""
+    global _caps
+    key = device_fingerprint(idx)
+    with _caps_lock:
+        if _caps is None:
+            _caps = _load_caps()
+        caps = _caps.get(key)
+    if caps is None:
+        caps = _probe_caps(idx)
+        print(f"[caps] probed {key}")
+        with _caps_lock:
+            _caps[key] = caps
+            _save_caps()
+    return caps
+
+def forget_caps(*indices):
+    """Drop cached capabilities, e.g. after a stream refused the cached params."""
+    with _caps_lock:
+        if not _caps:
+            return
+        dropped = False
+        for idx in indices:
+            try:
+                dropped = _caps.pop(device_fingerprint(idx), None) is not None or dropped
+            except Exception:
+                pass
+        if dropped:
+            _save_caps()
+
+def _direction_caps(idx, kind):
+    try:
+        return device_caps(idx)[kind]
+    except Exception:
+        return None   # unresolved / default device: let PortAudio decide
+
+def negotiate_stream(in_idx, out_idx):
+    """Pick (samplerate, (in_ch, out_ch)) both devices support, from the cache."""
+    ic = _direction_caps(in_idx, "in")
+    oc = _direction_caps(out_idx, "out")
+    def ok(caps, rate):
+        return caps is None or rate in caps["rates"]
+    rate   = next((r for r in PROBE_RATES if ok(ic, r) and ok(oc, r)), SAMPLE_RATE)
+    in_ch  = ic["channels"][0] if ic and ic["channels"] else 1
+    out_ch = oc["channels"][0] if oc and oc["channels"] else 1
+    return rate, (in_ch, out_ch)
+
+def measured_latency(idx):
+    """Round-trip latency (ms) measured for device idx, or None. Never probes."""
+    global _caps
+    try:
+        key = device_fingerprint(idx)
+    except Exception:
+        return None
+    with _caps_lock:
+        if _caps is None:
+            _caps = _load_caps()
+        return _caps.get(key, {}).get("rtl_ms")
+
+def record_latency(idx, ms):
+    device_caps(idx)
+    with _caps_lock:
+        _caps[device_fingerprint(idx)]["rtl_ms"] = ms
+        _save_caps()
+
+# ─── Devices — round-trip latency probe ───────────────────────────────────────
+# Plays a chirp through an output and records it back through an input that
+# hears it (VB-Cable pair or a physical loopback), then finds the delay by FFT
+# cross-correlation. Every host API variant of the pair is measured so the
+# scan can prefer the one that is actually fastest on this machine.
+PROBE_CHIRP_S    = 0.25
+PROBE_TAIL_S     = 0.75   # recording time after the chirp for the echo to arrive
+PROBE_REPEATS    = 3
+PROBE_MIN_PEAK   = 20.0   # correlation peak / median below this = no loopback heard
+
+def _chirp(rate):
+    t  = np.arange(int(rate * PROBE_CHIRP_S)) / rate
+    f0, f1 = 200.0, min(8000.0, rate / 2.5)
+    k  = (f1 - f0) / PROBE_CHIRP_S
+    return (0.5 * np.sin(2 * np.pi * (f0 * t + 0.5 * k * t * t))
+            * np.hanning(len(t))).astype("float32")
+
+def xcorr_delay(sent, recorded):
+    """Lag (samples) of sent inside recorded, and the peak-to-median ratio."""
+    n    = len(sent) + len(recorded)
+    nfft = 1 << (n - 1).bit_length()
+    corr = np.fft.irfft(np.fft.rfft(recorded, nfft) * np.conj(np.fft.rfft(sent, nfft)), nfft)
+    corr = np.abs(corr[:len(recorded)])
+    lag  = int(np.argmax(corr))
+    return lag, float(corr[lag] / (np.median(corr) + 1e-12))
+
+def measure_round_trip(in_idx, out_idx):
+    """Measure one in/out pair; returns dict with measured and reported ms."""
+    rate, channels = negotiate_stream(in_idx, out_idx)
+    sig  = _chirp(rate)
+    play = np.zeros(int(rate * (PROBE_CHIRP_S + PROBE_TAIL_S)), dtype="float32")
+    play[:len(sig)] = sig
+    results = []
+    for _ in range(PROBE_REPEATS):
+        rec  = np.zeros_like(play)
+        pos  = [0]
+        done = Event()
+        def callback(indata, outdata, frames, time_info, status):
+            i = pos[0]
+            n = min(frames, len(play) - i)
+            outdata[:n] = play[i:i + n, None]
+            outdata[n:] = 0.0
+            rec[i:i + n] = indata[:n, 0]
+            pos[0] = i + n
+            if pos[0] >= len(play):
+                raise sd.CallbackStop
+        with open_stream(
+            sd.Stream,
+            device=(in_idx, out_idx),
+            channels=channels,
+            samplerate=rate,
+            dtype="float32",
+            latency="low",
+            callback=callback,
+            finished_callback=done.set,
+        ) as stream:
+            reported = sum(stream.latency) * 1000.0
+            done.wait(PROBE_CHIRP_S + PROBE_TAIL_S + 2.0)
+        lag, peak = xcorr_delay(sig, rec)
+        if peak >= PROBE_MIN_PEAK:
+            results.append(lag / rate * 1000.0)
+    if not results:
+        raise RuntimeError("chirp not heard back — is the input a loopback of the output?")
+    return {"rtl_ms": float(np.median(results)), "reported_ms": reported}
+
+def _variant_pairs(in_name, out_name):
+    """(hostapi name, in_idx, out_idx) for every host API exposing both names."""
+    ins, outs = {}, {}
+    for idx, d in enumerate(_device_list):
+        if d["name"] == in_name and d["max_input_channels"] > 0:
+            ins[d["hostapi"]] = idx
+        if d["name"] == out_name and d["max_output_channels"] > 0:
+            outs[d["hostapi"]] = idx
+    return [(_hostapi_names[api] if api < len(_hostapi_names) else str(api),
+             ins[api], outs[api]) for api in sorted(ins.keys() & outs.keys())]
+
+def calibrate_latency(in_name, out_name):
+    """Measure all host API variants of a loopback pair and store the results.
+
+    Returns [(hostapi, result-or-error)] fastest first; the next device scan
+    ranks the measured variants by their round trip.
+    """
+    report = []
+    for api, in_idx, out_idx in _variant_pairs(in_name, out_name):
+        try:
+            res = measure_round_trip(in_idx, out_idx)
+        except Exception as e:
+            print(f"[latency] {api}: {e}")
+            report.append((api, str(e)))
+            continue
+        record_latency(in_idx, res["rtl_ms"])
+        record_latency(out_idx, res["rtl_ms"])
+        print(f"[latency] {api}: {res['rtl_ms']:.1f} ms measured, "
+              f"{res['reported_ms']:.1f} ms reported")
+        report.append((api, res))
+    report.sort(key=lambda r: r[1]["rtl_ms"] if isinstance(r[1], dict) else math.inf)
+    return report
+
+# ─── Audio — ring buffer ──────────────────────────────────────────────────────
+# Single-writer ring of mono float32 frames. The writer (an audio callback)
+# never blocks; every reader keeps its own absolute read position and copies
+# out with at most two slices, so nothing is allocated per block.
+def new_ring(frames):
+    return {"buf": np.zeros(frames, dtype="float32"), "size": frames, "w": 0}
+
+def ring_write(ring, data):
+    buf, size = ring["buf"], ring["size"]
+    n     = len(data)
+    w     = ring["w"] % size
+    first = min(n, size - w)
+    buf[w:w + first] = data[:first]
+    buf[:n - first]  = data[first:]
+    ring["w"] += n
+
+def ring_read(ring, pos, out):
+    """Copy len(out) frames starting at absolute position pos into out."""
+    buf, size = ring["buf"], ring["size"]
+    n     = len(out)
+    p     = pos % size
+    first = min(n, size - p)
+    out[:first] = buf[p:p + first]
+    out[first:] = buf[:n - first]
+
+# ─── Audio — file input source ────────────────────────────────────────────────
+# A WAV file can stand in for the input device, for reproducible tests and
+# demos. It shows up in the INPUT dropdown as "File: <name>"; the main
+# stream then becomes an OutputStream whose callback feeds audio_callback
+# blocks from the file, so gain, rage, monitor, taps and the visualizer all
+# see it exactly like a microphone. A decoder thread streams the file
+# (looping, resampled to the stream rate) into a ring kept FILE_READAHEAD_S
+# ahead of the callback, which only ever copies out of the ring.
+FILE_PREFIX      = "File: "
+FILE_READAHEAD_S = 2.0
+FILE_CHUNK_S     = 0.25
+FILE_POLL_S      = 0.02
+
+file_inputs = {}                # "File: name.wav" → path, in the order added
+
+def add_file_input(path):
+    """Register a file as an input choice; returns its dropdown name."""
+    name = FILE_PREFIX + os.path.basename(path)
+    if file_inputs.get(name, path) != path:
+        name = f"{name} ({os.path.basename(os.path.dirname(path))})"
+    file_inputs[name] = path
+    return name
+
+def input_choices():
+    return inputs + list(file_inputs)
+
+def _open_audio_reader(path):
+    """Return (samplerate, read(frames) → mono float32, rewind())."""
+    sf = _soundfile()
+    if sf is not None:
+        f = sf.SoundFile(path)
+        def read(n):
+            data = f.read(n, dtype="float32", always_2d=True)
+            return data.mean(axis=1) if data.shape[1] > 1 else data[:, 0]
+        return f.samplerate, read, lambda: f.seek(0), f.close
+    f = wave.open(path, "rb")
+    if f.getsampwidth() != 2:
+        f.close()
+        raise ValueError("only 16-bit PCM WAV is supported without soundfile")
+    ch = f.getnchannels()
+    def read(n):
+        data = np.frombuffer(f.readframes(n), dtype="<i2").astype("float32") / 32768.0
+        return data.reshape(-1, ch).mean(axis=1) if ch > 1 else data
+    return f.getframerate(), read, f.rewind, f.close
+
+def _file_source_loop(src):
+    rate, read, rewind, close = src["reader"]
+    step = rate / src["rate"]          # file frames per stream frame
+    chunk = max(1, int(FILE_CHUNK_S * rate))
+    t, last = 1.0, np.zeros(1, dtype="float32")   # t = 1 skips the dummy "last"
+    try:
+        while not src["stop"].is_set():
+            if src["ring"]["w"] - src["pos"] >= src["ahead"]:
+                src["stop"].wait(FILE_POLL_S)
+                continue
+            data = read(chunk)
+            if not len(data):
+                rewind()             # loop
+                continue
+            if step != 1.0:
+                # Streaming linear resampler: carry the last sample and the
+                # fractional read position over to the next chunk.
+                x    = np.concatenate((last, data))
+                idx  = np.arange(t, len(x) - 1, step)
+                t    = idx[-1] + step - (len(x) - 1) if len(idx) else t - len(data)
+                last = x[-1:]
+                data = np.interp(idx, np.arange(len(x)), x).astype("float32")
+            ring_write(src["ring"], data)
+    except Exception as e:
+        print(f"[file] {src['path']}: {e}")
+    finally:
+        close()
+
+def file_source_rate(path):
+    """Native sample rate of a file input, or None if it cannot be opened."""
+    try:
+        reader = _open_audio_reader(path)
+    except Exception:
+        return None
+    reader[3]()
+    return reader[0]
+
+def start_file_source(path, rate):
+    reader = _open_audio_reader(path)
+    ahead  = int(FILE_READAHEAD_S * rate)
+    src = {"path": path, "rate": rate, "reader": reader, "stop": Event(),
+           "ring": new_ring(ahead * 2), "ahead": ahead, "pos": 0, "underruns": 0,
+           "block": np.zeros((BLOCK_SIZE * 2, 1), dtype="float32")}
+    src["thread"] = Thread(target=_file_source_loop, args=(src,), daemon=True)
+    src["thread"].start()
+    return src
+
+def stop_file_source(src):
+    src["stop"].set()
+    src["thread"].join(timeout=1.0)
+
+def file_source_callback(outdata, frames, time_info, status, slot, src, process):
+    """Output-only main stream: pull the next block from the file, then run
+    the normal processing (process, e.g. audio_callback) on it as if it came
+    from an input device."""
+    block = src["block"][:frames]
+    if src["ring"]["w"] - src["pos"] >= frames:
+        ring_read(src["ring"], src["pos"], block[:, 0])
+        src["pos"] += frames
+    else:
+        block.fill(0.0)
+        src["underruns"] += 1
+    process(block, outdata, frames, time_info, status, slot)
+
+# ─── Audio — main stream ──────────────────────────────────────────────────────
+RECOVERY_BACKOFF_START = 0.25   # seconds before the first reopen attempt
+RECOVERY_BACKOFF_MAX   = 8.0
+STALL_TIMEOUT          = 1.0    # seconds without a callback before the stream counts as dead
+PRIME_BLOCKS           = 4      # callbacks a standby stream must deliver before taking over
+PRIME_TIMEOUT          = 2.0
+XFADE_TIMEOUT          = 1.0    # a crossfade not done by then is abandoned
+
+RELEASED        = object()      # run() result of supervise: closed for a PortAudio re-init
+_recover_event  = Event()       # wakes the supervisor out of its backoff sleep
+_switch_request = None          # (input, output) names to hot-switch the live stream to
+_live_slot      = None          # slot of the stream currently carrying audio
+_start_requested = None          # monotonic time of start(), until its first callback
+recovery_stats  = {"count": 0, "last_ms": None, "total_ms": 0.0}
+start_stats     = {"count": 0, "last_ms": None}   # start() → first audio callback
+switch_stats    = {"count": 0, "last_gap_ms": None, "last_switch_ms": None}
+
+def _new_slot(level, samplerate, hostapi=None, gain=None):
+    """Per-stream callback state: fade envelope, taps and liveness clock.
+
+    gain is what the first block ramps from (default: the main gain).
+    """
+    return {
+        "rate":    samplerate,
+        "hostapi": hostapi,
+        "level":   level,        # current output gain of this stream (0..1)
+        "target":  level,
+        "step":    fade_step(samplerate),
+        "taps":    level > 0,    # feed monitor/visualizer from this stream
+        "first":   None,         # time.monotonic() of the first callback
+        "last":    time.monotonic(),
+        "blocks":  0,
+        "first_audible": None,   # monotonic time of the first block with level > 0
+        "last_audible":  None,
+        "gain":    gain_value if gain is None else gain,   # render_block ramps from it
+    }
+
+def run_block(src, outdata, gain, slot, status, tag="[stream]"):
+    """The per-block core of every chain: the main one and each Chain.
+
+    Ticks the liveness clock the supervisor watches, renders src at gain
+    (ramped from the last block) through the slot's fade envelope into
+    outdata and stamps when audio was audible. Returns the rendered block.
+    """
+    now = time.monotonic()
+    slot["last"] = now
+    slot["blocks"] += 1
+    if slot["first"] is None:
+        slot["first"] = now
+    if status:
+        print(f"{tag} {status}")
+    level   = slot["level"]
+    boosted = render_block(src, gain, slot)
+    if level > 0.0 or slot["level"] > 0.0:
+        slot["last_audible"] = now
+        if slot["first_audible"] is None:
+            slot["first_audible"] = now
+    outdata[:] = boosted
+    return boosted
+
+def audio_callback(indata, outdata, frames, time_info, status, slot):
+    global _applied_seq
+    seq, params = _published_params
+    if seq != _applied_seq:
+        # A new parameter set: the whole of it lands between two blocks. The
+        # published slot is never cleared, so a set published while this
+        # block applies the previous one is picked up by the next block.
+        _apply_params(params)
+        _applied_seq = seq
+    if slot["taps"] and (_mixer_active or input_muted or input_gain != 1.0):
+        # Only the tapped stream pulls the extra inputs, so a crossfade
+        # between two streams never reads their rings twice.
+        src = mix_inputs(indata, frames)
+    else:
+        src = indata[:, :1]
+    boosted = run_block(src, outdata, gain_value, slot, status)
+    if not slot["taps"]:
+        return
+    if _fanout_active:
+        ring_write(_fanout_ring, boosted[:, 0])
+    mon = _monitor
+    if mon is not None:
+        ring_write(mon["ring"], src[:, 0] if monitor_tap == "pre" else boosted[:, 0])
+    rp = _replay
+    if rp is not None:
+        ring_write(rp, boosted[:, 0])
+    rec = _recorder
+    if rec is not None:
+        ring_write(rec["rings"]["input"],  indata[:, 0])
+        ring_write(rec["rings"]["output"], boosted[:, 0])
+    vq = viz_queue
+    if vq is not None:
+        try:
+            vq.put_nowait(boosted.copy())
+        except queue.Full:
+            pass
+
+def _find_compatible_output(in_idx, out_name):
+    try:
+        in_api = _device_list[in_idx]["hostapi"]
+    except Exception:
+        return None
+
+    preferred = resolve_output_index(out_name)
+    candidates = []
+    if preferred is not None and preferred != in_idx:
+        candidates.append(preferred)
+    for name, info in _device_index_map.items():
+        idx = info.get("out")
+        if idx is not None and idx not in candidates and idx != in_idx:
+            candidates.append(idx)
+
+    for out_idx in candidates:
+        try:
+            if _device_list[out_idx]["hostapi"] == in_api:
+                return out_idx
+        except Exception:
+            continue
+
+    return None
+
+def _open_file_stream(stack, path, out_name, level, callback, gain=None):
+    """Open an output-only main stream fed from a file input."""
+    out_idx = resolve_output_index(out_name)
+    rate, (_, out_ch) = negotiate_stream(None, out_idx)
+    native = file_source_rate(path)
+    caps = _direction_caps(out_idx, "out")
+    if native and (caps is None or native in caps["rates"]):
+        rate = native               # no resampling when the output allows it
+    try:
+        hostapi = _device_list[out_idx]["hostapi"]
+    except Exception:
+        hostapi = None
+    slot = _new_slot(level, rate, hostapi, gain)
+    src  = start_file_source(path, rate)
+    stack.callback(stop_file_source, src)
+    try:
+        stream = stack.enter_context(open_stream(
+            sd.OutputStream,
+            device=out_idx,
+            channels=out_ch,
+            samplerate=rate,
+            blocksize=BLOCK_SIZE,
+            dtype="float32",
+            callback=partial(file_source_callback, slot=slot, src=src, process=callback),
+        ))
+    except Exception:
+        forget_caps(out_idx)
+        raise
+    return stream, slot
+
+def _open_main_stream(stack, in_name, out_name, level, callback=None, gain=None):
+    """Open a duplex stream for in_name → out_name on an ExitStack.
+
+    callback(indata, outdata, frames, time_info, status, slot) defaults to
+    audio_callback; extra chains pass their own, and the gain their first
+    block ramps from.
+    """
+    callback = callback or audio_callback
+    if in_name in file_inputs:
+        return _open_file_stream(stack, file_inputs[in_name], out_name, level, callback, gain)
+    in_idx   = resolve_input_index(in_name)
+    out_idx  = _find_compatible_output(in_idx, out_name)
+    rate, channels = negotiate_stream(in_idx, out_idx)
+    try:
+        hostapi = _device_list[in_idx]["hostapi"]
+    except Exception:
+        hostapi = None
+    slot     = _new_slot(level, rate, hostapi, gain)
+    try:
+        stream = stack.enter_context(open_stream(
+            sd.Stream,
+            device=(in_idx, out_idx),
+            channels=channels,
+            samplerate=rate,
+            blocksize=BLOCK_SIZE,
+            dtype="float32",
+            callback=partial(callback, slot=slot),
+        ))
+    except Exception:
+        forget_caps(in_idx, out_idx)   # re-probe on the next attempt
+        raise
+    return stream, slot
+
+def _record_recovery(failed_at, slot, stats=recovery_stats, tag="[stream]"):
+    ms = (slot["first"] - failed_at) * 1000.0
+    stats["count"]    += 1
+    stats["last_ms"]   = ms
+    stats["total_ms"] += ms
+    print(f"{tag} recovered in {ms:.0f} ms "
+          f"(#{stats['count']}, {stats['total_ms']:.0f} ms total)")
+
+def _check_stream(stream, slot, outage, stats=recovery_stats, tag="[stream]"):
+    """One supervision tick: note a recovery, and return why the stream is
+    dead (stopped, or no callback for STALL_TIMEOUT), or None if it is fine.
+
+    outage["failed_at"] is when the current outage began, or None; it is
+    cleared only once the reopened stream has delivered audio.
+    """
+    if outage["failed_at"] is not None and slot["first"] is not None:
+        _record_recovery(outage["failed_at"], slot, stats, tag)
+        outage["failed_at"] = None
+    if not stream.active:
+        return "stream stopped"
+    if time.monotonic() - slot["last"] > STALL_TIMEOUT:
+        return f"no callback for {STALL_TIMEOUT:.0f}s"
+    return None
+
+def supervise(run, is_running, wake, tag="[stream]", on_outage=None):
+    """Keep a stream up: call run(outage) until is_running() is False,
+    reopening with exponential backoff after each failure.
+
+    run opens the stream and returns (or raises) why it stopped, or
+    RELEASED when it closed for a PortAudio re-init: that reopens as soon
+    as the re-init is done, without backoff. on_outage(reason) is called
+    when a failure starts a new outage.
+    """
+    backoff = RECOVERY_BACKOFF_START
+    outage  = {"failed_at": None}
+    while is_running():
+        try:
+            reason = run(outage)
+        except Exception as e:
+            reason = str(e)
+        if not is_running():
+            break
+        if reason is RELEASED:
+            while _reinit_gate.is_set() and is_running():
+                wake.wait(0.05)
+            wake.clear()
+            continue
+        if outage["failed_at"] is None:
+            # Audio was flowing before this failure: a new outage, fresh
+            # backoff. A reopen that fails, or opens but never delivers a
+            # callback, leaves failed_at alone and the backoff keeps growing.
+            outage["failed_at"] = time.monotonic()
+            backoff = RECOVERY_BACKOFF_START
+            if on_outage is not None:
+                on_outage(reason)
+        print(f"{tag} {reason} — retrying in {backoff:.2f}s")
+        wake.wait(backoff)
+        wake.clear()
+        backoff = min(backoff * 2, RECOVERY_BACKOFF_MAX)
+
+def _hot_switch(old_stream, old_slot, in_name, out_name):
+    """Bring up in_name → out_name next to the live stream and crossfade to it.
+
+    Returns (stack, stream, slot) of the new stream, or None if it could not
+    be opened and primed, or stalled during the crossfade; the old stream
+    then keeps (or goes back to) carrying the audio.
+    """
+    requested = time.monotonic()
+    stack = ExitStack()
+    try:
+        stream, slot = _open_main_stream(stack, in_name, out_name, level=0.0)
+        deadline = requested + PRIME_TIMEOUT
+        while slot["blocks"] < PRIME_BLOCKS:
+            if time.monotonic() > deadline:
+                raise RuntimeError("standby stream did not start")
+            sd.sleep(5)
+    except Exception as e:
+        stack.close()
+        err = f"switch failed: {e}"
+        print(f"[stream] {err}")
+        _emit("error", err)
+        return None
+
+    slot["taps"], old_slot["taps"] = True, False
+    slot["target"], old_slot["target"] = 1.0, 0.0
+    deadline = time.monotonic() + XFADE_TIMEOUT
+    failed   = None
+    while old_slot["level"] > 0.0 or slot["level"] < 1.0:
+        now = time.monotonic()
+        if not running:
+            failed = "stopped"
+        elif not stream.active or now - slot["last"] > STALL_TIMEOUT or now > deadline:
+            failed = "standby stream stalled during the crossfade"
+        elif not old_stream.active or now - old_slot["last"] > STALL_TIMEOUT:
+            slot["level"] = 1.0   # old stream is gone: nothing left to fade against
+            break
+        if failed is not None:
+            break
+        sd.sleep(2)
+    if failed is not None:
+        # Hand the audio back to the old stream and drop the standby one.
+        slot["taps"], old_slot["taps"] = False, True
+        slot["target"], old_slot["target"] = 0.0, 1.0
+        stack.close()
+        if running:
+            print(f"[stream] switch failed: {failed}")
+            _emit("error", f"switch failed: {failed}")
+        return None
+    # Both timestamps are taken at callback time; correct for the output
+    # latency of each stream to compare when the audio reaches the device.
+    old_end = (old_slot["last_audible"] or requested) + BLOCK_SIZE / old_slot["rate"]
+    gap = ((slot["first_audible"] or time.monotonic()) + stream.latency[1]
+           - old_end - old_stream.latency[1])
+    switch_stats["count"]         += 1
+    switch_stats["last_gap_ms"]    = max(0.0, gap * 1000.0)
+    switch_stats["last_switch_ms"] = (time.monotonic() - requested) * 1000.0
+    print(f"[stream] switched to {in_name} → {out_name} in "
+          f"{switch_stats['last_switch_ms']:.0f} ms, gap {switch_stats['last_gap_ms']:.1f} ms")
+    return stack, stream, slot
+
+def _record_start(slot):
+    global _start_requested
+    requested, _start_requested = _start_requested, None
+    ms = (slot["first"] - requested) * 1000.0
+    start_stats["count"]  += 1
+    start_stats["last_ms"] = ms
+    print(f"[startup] first audio callback {ms:.0f} ms after start "
+          f"({input_device} → {output_device})")
+
+def _run_stream(outage):
+    """Run the main stream until Stop or until it fails; return why it failed."""
+    global _live_slot, _switch_request, _last_align, input_device, output_device
+    if _switch_request is not None:
+        # Nothing is live to crossfade from: just retarget this open.
+        (input_device, output_device), _switch_request = _switch_request, None
+    current = ExitStack()
+    try:
+        stream, _live_slot = _open_main_stream(current, input_device, output_device, level=1.0)
+        ensure_replay(_live_slot["rate"])
+        sync_extras(_live_slot["rate"])
+        resume_monitor()
+        while running:
+            sd.sleep(100)
+            if _start_requested is not None and _live_slot["first"] is not None:
+                _record_start(_live_slot)
+            if extra_outputs or extra_inputs:
+                sync_extras(_live_slot["rate"])
+            if _mixer_active and time.monotonic() - _last_align > ALIGN_INTERVAL:
+                _last_align = time.monotonic()
+                align_extra_inputs(_live_slot["rate"])
+            recovering = outage["failed_at"] is not None
+            reason = _check_stream(stream, _live_slot, outage)
+            if recovering and outage["failed_at"] is None:
+                _emit("status", "LIVE")
+            if reason is not None:
+                return reason
+            if _switch_request is not None:
+                (in_name, out_name), _switch_request = _switch_request, None
+                _recover_event.clear()
+                switched = _hot_switch(stream, _live_slot, in_name, out_name)
+                if switched is not None:
+                    current.close()
+                    current, stream, _live_slot = switched
+                    input_device, output_device = in_name, out_name
+                    ensure_replay(_live_slot["rate"])
+                    sync_extras(_live_slot["rate"])
+        return None
+    finally:
+        current.close()
+        _live_slot = None
+
+def _main_outage(reason):
+    # Nothing feeds the monitor or the extra devices until the main stream
+    # is back; closing them lets PortAudio re-init meanwhile.
+    close_extras()
+    suspend_monitor()
+    _emit("error", reason)
+    _emit("status", "RECOVERING")
+
+def audio_loop():
+    """Supervise the main stream, reopening it with exponential backoff."""
+    supervise(_run_stream, lambda: running, _recover_event, on_outage=_main_outage)
+    close_extras()
+    stop_recording()
+
+def start(in_name, out_name):
+    """Start the supervisor on in_name → out_name; False if already running."""
+    global running, audio_thread, input_device, output_device, _start_requested
+    if running:
+        return False
+    if audio_thread is not None:
+        audio_thread.join(timeout=1.0)   # let a just-stopped supervisor exit
+    input_device, output_device = in_name, out_name
+    _start_requested = time.monotonic()
+    running = True
+    _recover_event.clear()
+    audio_thread = Thread(target=audio_loop, daemon=True)
+    audio_thread.start()
+    _emit("status", "LIVE")
+    return True
+
+def stop():
+    global running, _start_requested
+    running = False
+    _start_requested = None
+    _recover_event.set()
+    stop_monitor()
+    _emit("status", "IDLE")
+
+def first_callback_at():
+    """monotonic time of the live stream's first callback, or None."""
+    slot = _live_slot
+    return None if slot is None else slot["first"]
+
+def reconnect_audio():
+    """Retry the main stream now instead of waiting out the backoff."""
+    if audio_thread is not None and audio_thread.is_alive():
+        _recover_event.set()
+    else:
+        start(input_device, output_device)
+
+def request_device_switch(in_name, out_name):
+    """Ask the supervisor to move the live stream to new devices without a gap."""
+    global _switch_request
+    _switch_request = (in_name, out_name)
+    _recover_event.set()
+
+def start_from_settings(cfg):
+    """Scan devices and start the saved input → output on a new thread.
+
+    Lets a host get audio flowing straight from settings.json while it is
+    still building its UI. Returns a dict whose "done" Event is set once
+    inputs/outputs are filled in; "error" is the scan error or None and
+    "started" tells whether the saved devices were there to start.
+    """
+    boot = {"done": Event(), "error": None, "started": False}
+    def work():
+        global gain_value, slider_gain, input_gain, input_muted
+        try:
+            boot["error"] = scan_devices()
+            if boot["error"]:
+                return
+            for path in cfg.get("input_files", []):
+                if os.path.isfile(path):
+                    add_file_input(path)
+            add_saved_chains(cfg)
+            saved_in = cfg.get("input", "")
+            out_name = find_best_output(outputs, cfg.get("output", ""))
+            if saved_in not in input_choices() or out_name is None:
+                return
+            try:
+                gain_value  = slider_gain = slider_to_gain(float(cfg.get("gain", 100)))
+                input_gain  = slider_to_gain(float(cfg.get("input_gain", 100)))
+            except Exception:
+                pass
+            input_muted = bool(cfg.get("input_mute", False))
+            boot["started"] = start(saved_in, out_name)
+        except Exception as e:
+            print(f"[startup] early start failed: {e}")
+        finally:
+            boot["done"].set()
+    Thread(target=work, daemon=True).start()
+    return boot
+
+# ─── Profiles ─────────────────────────────────────────────────────────────────
+# Named presets live under "profiles" in settings.json, each a subset of the
+# top-level settings keys. Switching compiles the profile's processing
+# parameters into one dict that audio_callback installs between two blocks,
+# so a switch between profiles on the same devices never touches the
+# streams; the gain change itself is ramped across one block.
+PROFILE_KEYS = ("input", "output", "monitor", "gain", "rage", "input_gain", "input_mute",
+                "monitor_gain", "monitor_tap", "sidetone_gain")
+
+_published_params = (0, None)    # (seq, compiled parameters) most recently published
+_applied_seq      = 0            # seq of the set the globals hold
+
+def compile_params(profile):
+    """The engine parameter set of a profile dict, ready to swap in."""
+    rage   = bool(profile.get("rage", rage_mode))   # settings.json itself has no "rage"
+    slider = slider_to_gain(profile.get("gain", 100))
+    return {
+        "rage_mode":          rage,
+        "gain_value":         RAGE_GAIN if rage else slider,
+        "slider_gain":        slider,
+        "input_gain":         slider_to_gain(profile.get("input_gain", 100)),
+        "input_muted":        bool(profile.get("input_mute", False)),
+        "monitor_gain_value": slider_to_gain(profile.get("monitor_gain", 100)),
+        "monitor_tap":        profile.get("monitor_tap", "post"),
+        "sidetone_gain":      float(profile.get("sidetone_gain", 50)) / 100.0,
+    }
+
+def _apply_params(p):
+    global rage_mode, gain_value, slider_gain, input_gain, input_muted
+    global monitor_gain_value, monitor_tap, sidetone_gain
+    rage_mode          = p["rage_mode"]
+    gain_value         = p["gain_value"]
+    slider_gain        = p["slider_gain"]
+    input_gain         = p["input_gain"]
+    input_muted        = p["input_muted"]
+    monitor_gain_value = p["monitor_gain_value"]
+    monitor_tap        = p["monitor_tap"]
+    sidetone_gain      = p["sidetone_gain"]
+
+def swap_params(params):
+    """Install a compiled parameter set at the next block boundary.
+
+    Writers publish an immutable (seq, params) pair; audio_callback applies
+    it once its seq differs from the last one applied, so no set is lost
+    between the callback reading the slot and applying it.
+    """
+    global _published_params, _applied_seq
+    with _params_lock:
+        seq = _published_params[0] + 1
+        _published_params = (seq, dict(params))
+        slot = _live_slot
+        if not (running and slot is not None and time.monotonic() - slot["last"] < STALL_TIMEOUT):
+            _applied_seq = seq           # no callback to hand it to: apply it here
+            _apply_params(params)
+
+_params_lock = RLock()           # orders concurrent writers; the callback never takes it
+
+def current_params():
+    """The parameter set in effect once any published set has landed."""
+    seq, params = _published_params
+    if seq != _applied_seq:
+        return dict(params)
+    return {"rage_mode": rage_mode, "gain_value": gain_value, "slider_gain": slider_gain,
+            "input_gain": input_gain, "input_muted": input_muted, "monitor_gain_value": monitor_gain_value,
+            "monitor_tap": monitor_tap, "sidetone_gain": sidetone_gain}
+
+def update_params(**changes):
+    """Change some parameters; they land together at the next block boundary."""
+    with _params_lock:
+        swap_params({**current_params(), **changes})
+
+def apply_profile(profile):
+    """Swap a profile's parameters in; hot-switch devices only if they differ."""
+    swap_params(compile_params(profile))
+    in_name, out_name = profile.get("input"), profile.get("output")
+    if (running and in_name in input_choices() and out_name in outputs
+            and (in_name, out_name) != (input_device, output_device)):
+        request_device_switch(in_name, out_name)
+
+def load_profiles():
+    """{name: profile} from settings.json."""
+    profiles = load_settings().get("profiles", {})
+    return profiles if isinstance(profiles, dict) else {}
+
+def profile_from_settings(cfg):
+    return {k: cfg[k] for k in PROFILE_KEYS if k in cfg}
+
+# ─── Audio — independent chains ──────────────────────────────────────────────
+# The functions above run the primary chain, which owns the monitor, the
+# recorder, replay, fan-out, the input mixer and profile swaps. A Chain is
+# another mic → output path next to it (say a second mic into a second
+# virtual cable) with its own stream, gain, fade state and meters. It runs
+# the same per-block core (run_block: liveness clock, gain ramp, fade) and
+# the same supervisor (supervise: backoff, outage and recovery stats) as
+# the primary chain, but none of the primary chain's taps. Chains share the
+# read-only tables of this module: the device scan and index map, the
+# capability cache and the measured latencies.
+chains = []                      # running Chain instances, in the order added
+
+class Chain:
+    """One independent input → output chain."""
+
+    __slots__ = ("input_device", "output_device", "slider", "gain", "rage",
+                 "running", "peak", "rms", "recovery_stats", "_slot", "_thread", "_wake")
+
+    def __init__(self, input_device, output_device, slider=100.0):
+        self.input_device   = input_device
+        self.output_device  = output_device
+        self.rage           = False
+        self.running        = False
+        self.peak           = 0.0    # of the last processed block, 0..1
+        self.rms            = 0.0
+        self.recovery_stats = {"count": 0, "last_ms": None, "total_ms": 0.0}
+        self._slot          = None
+        self._thread        = None
+        self._wake          = Event()
+        self.set_gain(slider)
+
+    def __repr__(self):
+        return f"Chain({self.input_device!r} → {self.output_device!r})"
+
+    @property
+    def tag(self):
+        return f"[chain] {self.input_device} → {self.output_device}:"
+
+    def set_gain(self, slider):
+        self.slider = float(slider)
+        self.gain   = slider_to_gain(self.slider)
+
+    def start(self):
+        if self.running:
+            return False
+        self.running = True
+        self._wake.clear()
+        self._thread = Thread(target=supervise, daemon=True,
+                              args=(self._run, lambda: self.running, self._wake, self.tag))
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def retarget(self, in_name, out_name):
+        """Move the chain to other devices (reopens its stream)."""
+        running = self.running
+        self.stop()
+        self.input_device, self.output_device = in_name, out_name
+        if running:
+            self.start()
+
+    def first_callback_at(self):
+        slot = self._slot
+        return None if slot is None else slot["first"]
+
+    def settings(self):
+        return {"input": self.input_device, "output": self.output_device, "gain": self.slider}
+
+    def _callback(self, indata, outdata, frames, time_info, status, slot):
+        boosted = run_block(indata[:, :1], outdata, RAGE_GAIN if self.rage else self.gain,
+                            slot, status, self.tag)
+        self.peak = float(np.abs(boosted).max())
+        self.rms  = float(np.sqrt(np.mean(np.square(boosted))))
+
+    def _run(self, outage):
+        """Run the chain's stream until stopped or failed (see supervise)."""
+        stack = ExitStack()
+        try:
+            stream, self._slot = _open_main_stream(
+                stack, self.input_device, self.output_device, 1.0, callback=self._callback,
+                gain=RAGE_GAIN if self.rage else self.gain)
+            while self.running:
+                sd.sleep(100)
+                if _reinit_gate.is_set():
+                    return RELEASED        # the watcher re-inits PortAudio: let go
+                reason = _check_stream(stream, self._slot, outage, self.recovery_stats, self.tag)
+                if reason is not None:
+                    return reason
+            return None
+        finally:
+            stack.close()
+            self._slot = None
+            self.peak = self.rms = 0.0
+
+def add_chain(in_name, out_name, slider=100.0):
+    """Start another chain in_name → out_name; returns the Chain."""
+    chain = Chain(in_name, out_name, slider)
+    chains.append(chain)
+    chain.start()
+    return chain
+
+def remove_chain(chain):
+    if chain in chains:
+        chains.remove(chain)
+    chain.stop()
+
+def stop_chains():
+    for chain in list(chains):
+        remove_chain(chain)
+
+def add_saved_chains(cfg):
+    """Start the "chains" of a settings.json dict whose devices are present."""
+    for c in cfg.get("chains", []):
+        if c.get("input") in input_choices() and c.get("output") in outputs:
+            add_chain(c["input"], c["output"], c.get("gain", 100))
+
+# ─── Audio — monitor ──────────────────────────────────────────────────────────
+# PortAudio cannot drive two output devices from one stream, so the monitor
+# is its own callback OutputStream. The main callback renders into a
+# preallocated ring and the monitor callback pulls from it through an
+# adaptive jitter buffer: the target depth grows by a block on every
+# underrun and shrinks again after a stable stretch. Underruns are concealed
+# by fading out the last block played backwards and fading back in on resume.
+# A monitor on the main stream's host API starts at a one-block target with
+# low latency; any other device starts deeper to absorb clock jitter.
+# The monitor mix has its own gain and tap point (raw mic or boosted output)
+# and can add a sidetone input that is heard on the monitor only.
+MONITOR_RING_FRAMES  = BLOCK_SIZE * 64
+MONITOR_START_BLOCKS = {True: 1, False: 4}   # keyed by "shares the host API"
+MONITOR_MAX_BLOCKS   = 24
+MONITOR_SHRINK_AFTER = 400    # underrun-free blocks before the target shrinks
+
+SIDETONE_MAX_LAG     = BLOCK_SIZE * 4
+
+_monitor        = None        # jitter-buffer state while monitoring
+_monitor_stack  = None
+_monitor_suspended = False    # closed for a main-stream outage, reopened after it
+_sidetone       = None        # sidetone input ring + read position
+_sidetone_stack = None
+
+def _new_monitor(rate, shared):
+    ramp = np.linspace(0.0, 1.0, BLOCK_SIZE, dtype="float32")
+    return {
+        "ring":       new_ring(MONITOR_RING_FRAMES),
+        "pos":        0,
+        "rate":       rate,
+        "min":        BLOCK_SIZE * MONITOR_START_BLOCKS[shared],
+        "target":     BLOCK_SIZE * MONITOR_START_BLOCKS[shared],
+        "stable":     0,
+        "concealing": True,           # start silent until the target is buffered
+        "last":       np.zeros(BLOCK_SIZE, dtype="float32"),
+        "tmp":        np.zeros(BLOCK_SIZE, dtype="float32"),
+        "fade_in":    ramp,
+        "fade_out":   ramp[::-1].copy(),
+        "out_latency": 0.0,
+        "latency_ms": 0.0,
+        "underruns":  0,
+    }
+
+def _pull_monitor(mon, out, frames):
+    """Fill out with the next frames of the monitor tap (jitter-buffered)."""
+    ring  = mon["ring"]
+    avail = ring["w"] - mon["pos"]
+    if avail < frames or (mon["concealing"] and avail < mon["target"]):
+        if not mon["concealing"]:
+            # Underrun: play the last block backwards (continuous at the seam)
+            # under a fade-out instead of dropping straight to silence.
+            np.multiply(mon["last"][frames - 1::-1], mon["fade_out"][:frames], out=out)
+            mon["concealing"] = True
+            mon["underruns"] += 1
+            mon["target"] = min(mon["target"] + frames, BLOCK_SIZE * MONITOR_MAX_BLOCKS)
+            mon["stable"] = 0
+        else:
+            out.fill(0.0)
+        return
+
+    if avail > mon["target"] + 2 * frames:
+        # Too much backlog (drift, or the target just shrank): jump ahead,
+        # crossfading from the continuous audio to the newer frames.
+        ring_read(ring, mon["pos"], mon["tmp"][:frames])
+        mon["pos"] = ring["w"] - mon["target"]
+        ring_read(ring, mon["pos"], out)
+        out *= mon["fade_in"][:frames]
+        mon["tmp"][:frames] *= mon["fade_out"][:frames]
+        out += mon["tmp"][:frames]
+    else:
+        ring_read(ring, mon["pos"], out)
+        if mon["concealing"]:
+            out *= mon["fade_in"][:frames]
+    mon["pos"] += frames
+    mon["concealing"] = False
+    mon["last"][:frames] = out
+
+    mon["stable"] += 1
+    if mon["stable"] >= MONITOR_SHRINK_AFTER and mon["target"] > mon["min"]:
+        mon["target"] -= frames
+        mon["stable"]  = 0
+    mon["latency_ms"] = ((ring["w"] - mon["pos"]) / mon["rate"] + mon["out_latency"]) * 1000.0
+
+def _mix_sidetone(st, out, frames, scratch):
+    ring  = st["ring"]
+    avail = ring["w"] - st["pos"]
+    if avail < frames:
+        return                       # sidetone starved this block: skip it
+    if avail > SIDETONE_MAX_LAG:
+        st["pos"] = ring["w"] - frames
+    ring_read(ring, st["pos"], scratch)
+    st["pos"] += frames
+    scratch *= sidetone_gain
+    out += scratch
+
+def monitor_callback(outdata, frames, time_info, status, mon):
+    # Everything below works in place on outdata and the monitor's own
+    # preallocated scratch block; nothing is allocated per callback.
+    out = outdata[:, 0]
+    _pull_monitor(mon, out, frames)
+    g = monitor_gain_value
+    if g != 1.0:
+        out *= g
+    st = _sidetone
+    if st is not None:
+        _mix_sidetone(st, out, frames, mon["tmp"][:frames])
+    if g > 1.0 or st is not None:
+        np.clip(out, -1.0, 1.0, out=out)
+
+def sidetone_callback(indata, frames, time_info, status, st):
+    ring_write(st["ring"], indata[:, 0])
+
+def _start_sidetone(rate):
+    """Open the sidetone input for the monitor mix, if one is selected."""
+    global _sidetone, _sidetone_stack
+    if not sidetone_device or sidetone_device == "None":
+        return
+    st    = {"ring": new_ring(BLOCK_SIZE * 16), "pos": 0}
+    stack = ExitStack()
+    try:
+        stack.enter_context(open_stream(
+            sd.InputStream,
+            device=resolve_input_index(sidetone_device),
+            channels=1,
+            samplerate=rate,
+            blocksize=BLOCK_SIZE,
+            latency="low",
+            dtype="float32",
+            callback=partial(sidetone_callback, st=st),
+        ))
+    except Exception as e:
+        stack.close()
+        print(f"[monitor] sidetone unavailable: {e}")
+        return
+    _sidetone, _sidetone_stack = st, stack
+
+def _stop_sidetone():
+    global _sidetone, _sidetone_stack
+    if _sidetone_stack is not None:
+        _sidetone_stack.close()
+        _sidetone_stack = None
+    _sidetone = None
+
+def restart_sidetone():
+    """Apply a new sidetone_device to a running monitor."""
+    _stop_sidetone()
+    if _monitor is not None:
+        _start_sidetone(_monitor["rate"])
+
+def _monitor_hostapi(dev):
+    try:
+        idx = sd.default.device[1] if dev is None else dev
+        return _device_list[idx]["hostapi"]
+    except Exception:
+        return None
+
+def start_monitor():
+    """Open the monitor stream; returns False (and reports why) on failure."""
+    global _monitor, _monitor_stack, monitoring
+    dev    = None if monitor_device == "System Default" else resolve_output_index(monitor_device)
+    slot   = _live_slot if running else None
+    rate   = slot["rate"] if slot else SAMPLE_RATE
+    shared = slot is not None and slot["hostapi"] is not None \
+             and _monitor_hostapi(dev) == slot["hostapi"]
+    mon    = _new_monitor(rate, shared)
+    stack  = ExitStack()
+    try:
+        stream = stack.enter_context(open_stream(
+            sd.OutputStream,
+            device=dev,
+            channels=1,
+            samplerate=rate,
+            blocksize=BLOCK_SIZE,
+            latency="low" if shared else 0.05,
+            dtype="float32",
+            callback=partial(monitor_callback, mon=mon),
+        ))
+    except Exception as e:
+        stack.close()
+        _emit("error", f"monitor: {e}")
+        return False
+    mon["out_latency"] = stream.latency
+    _monitor, _monitor_stack = mon, stack
+    monitoring = True
+    _start_sidetone(rate)
+    print(f"[monitor] {'same host API' if shared else 'separate host API'}, "
+          f"starting at {mon['target'] / rate * 1000:.1f} ms buffer")
+    return True
+
+def _close_monitor():
+    global _monitor, _monitor_stack
+    if _monitor_stack is not None:
+        _monitor_stack.close()
+        _monitor_stack = None
+    _monitor = None
+    _stop_sidetone()
+
+def stop_monitor():
+    global monitoring, _monitor_suspended
+    monitoring = _monitor_suspended = False
+    _close_monitor()
+
+def suspend_monitor():
+    """Close the monitor streams for a main-stream outage; monitoring stays on."""
+    global _monitor_suspended
+    if monitoring and _monitor_stack is not None:
+        _close_monitor()
+        _monitor_suspended = True
+
+def resume_monitor():
+    """Reopen a suspended monitor at the reopened main stream's rate."""
+    global monitoring, _monitor_suspended
+    if not _monitor_suspended:
+        return
+    _monitor_suspended = False
+    if monitoring and not start_monitor():
+        monitoring = False
+        _emit("params", {"monitoring": False})
+
+def monitor_latency_ms():
+    """End-to-end monitor buffer latency, or None while not monitoring."""
+    mon = _monitor
+    return None if mon is None else mon["latency_ms"]
+
+# ─── Audio — drift-compensated ring readers ───────────────────────────────────
+# A ring written on one device clock and read on another drifts by a few
+# hundred ppm. A drift reader resamples by linear interpolation at a ratio
+# close to 1.0, steered so its buffer fill stays near its target.
+DRIFT_MAX  = 0.002     # max resampling correction (±2000 ppm)
+DRIFT_GAIN = 0.004     # ratio change per unit of relative fill error
+_DRIFT_RAMP = np.arange(BLOCK_SIZE * 2, dtype="float64")
+
+def new_drift_reader(target):
+    return {
+        "target":    float(target),
+        "pos":       0.0,            # fractional absolute read position
+        "ratio":     1.0,
+        "fill":      float(target),  # smoothed buffer fill
+        "src":       np.zeros(BLOCK_SIZE * 4 + 4, dtype="float32"),
+        "t":         np.zeros(BLOCK_SIZE * 2, dtype="float64"),
+        "underruns": 0,
+    }
+
+def reset_drift_reader(rd, ring):
+    rd["pos"], rd["fill"], rd["ratio"] = ring["w"] - rd["target"], rd["target"], 1.0
+
+def drift_read(ring, rd, out, frames):
+    """Resample the next frames out of ring into out; False on underrun."""
+    fill = ring["w"] - rd["pos"]
+    if fill > ring["size"] - 2 * BLOCK_SIZE:
+        rd["pos"] = ring["w"] - rd["target"]   # fell too far behind
+        fill = rd["target"]
+    if fill < frames * rd["ratio"] + 2:
+        rd["underruns"] += 1
+        return False
+
+    rd["fill"] += 0.01 * (fill - rd["fill"])
+    err   = (rd["fill"] - rd["target"]) / rd["target"]
+    ratio = 1.0 + max(-DRIFT_MAX, min(DRIFT_MAX, DRIFT_GAIN * err))
+    rd["ratio"] = ratio
+
+    pos   = rd["pos"]
+    base  = int(pos)
+    t     = rd["t"][:frames]
+    np.multiply(_DRIFT_RAMP[:frames], ratio, out=t)
+    t    += pos - base
+    n_src = int(t[-1]) + 2
+    src   = rd["src"][:n_src]
+    ring_read(ring, base, src)
+    i0    = t.astype(np.intp)
+    t    -= i0
+    a     = src[i0]
+    out[:] = a + (src[i0 + 1] - a) * t
+    rd["pos"] = pos + frames * ratio
+    return True
+
+# ─── Audio — fan-out outputs ──────────────────────────────────────────────────
+# Extra output devices (a second virtual cable for a recorder, …) next to
+# the main duplex output. The main callback writes each processed block
+# once into _fanout_ring; every destination is its own OutputStream with its
+# own drift reader and gain.
+FANOUT_RING_FRAMES = BLOCK_SIZE * 64
+FANOUT_TARGET      = BLOCK_SIZE * 4
+EXTRA_RETRY_S      = 3.0       # seconds between reopen attempts of a dead extra device
+
+_fanout_ring   = new_ring(FANOUT_RING_FRAMES)
+_extras_lock   = Lock()        # guards extra_outputs / extra_inputs and their streams
+_fanout_active = False         # any destination open: the main callback feeds the ring
+extra_outputs  = []            # destination dicts, in UI order
+
+def _new_destination(name, gain=1.0):
+    dest = new_drift_reader(FANOUT_TARGET)
+    dest.update({"name": name, "gain": gain, "stack": None, "stream": None,
+                 "rate": None, "retry_at": 0.0})
+    return dest
+
+def fanout_callback(outdata, frames, time_info, status, dest):
+    out = outdata[:, 0]
+    if not drift_read(_fanout_ring, dest, out, frames):
+        out.fill(0.0)
+        return
+    if dest["gain"] != 1.0:
+        out *= dest["gain"]
+
+# ─── Audio — multi-input mixer ────────────────────────────────────────────────
+# Extra input devices mixed with the main input before any processing. Each
+# is an InputStream writing into its own ring; the main callback pulls every
+# extra input through a drift reader, scales it and sums it into one
+# preallocated mix block, then runs the DSP once on the mix. Devices hear
+# the same voice with different latencies, so every ALIGN_INTERVAL the
+# supervisor cross-correlates what each extra input contributed against the
+# main input and jumps its read position to line the two up.
+MIXER_RING_FRAMES = BLOCK_SIZE * 64
+MIXER_TARGET      = BLOCK_SIZE * 3
+ALIGN_RING_FRAMES = 1 << 16
+ALIGN_WINDOW      = 1 << 14     # frames correlated per alignment pass
+ALIGN_MAX_LAG     = 4800        # ±100 ms at 48 kHz
+ALIGN_INTERVAL    = 2.0
+ALIGN_MIN_PEAK    = 12.0        # correlation peak / median needed to trust a lag
+ALIGN_MIN_RMS     = 0.005       # skip alignment while the main input is quiet
+
+input_gain     = 1.0            # main input level in the mix
+input_muted    = False
+extra_inputs   = []             # input dicts, in UI order
+_mixer_active  = False          # any extra input open: the callback mixes
+_mix_buf       = np.zeros((BLOCK_SIZE * 2, 1), dtype="float32")
+_mix_scratch   = np.zeros(BLOCK_SIZE * 2, dtype="float32")
+_input_history = new_ring(ALIGN_RING_FRAMES)   # main input, for alignment
+_last_align    = 0.0
+
+def _new_input(name, gain=1.0, muted=False):
+    inp = new_drift_reader(MIXER_TARGET)
+    inp.update({"name": name, "gain": gain, "muted": muted, "stack": None,
+                "stream": None, "rate": None, "retry_at": 0.0,
+                "ring":    new_ring(MIXER_RING_FRAMES),
+                "history": new_ring(ALIGN_RING_FRAMES),   # what it added to the mix
+                "offset_ms": 0.0})
+    return inp
+
+def mixer_input_callback(indata, frames, time_info, status, inp):
+    ring_write(inp["ring"], indata[:, 0])
+
+def mix_inputs(indata, frames):
+    """Sum the main and extra inputs into _mix_buf; returns the mix block."""
+    mix = _mix_buf[:frames]
+    if input_muted:
+        mix.fill(0.0)
+    else:
+        np.multiply(indata[:, :1], input_gain, out=mix)
+    scratch = _mix_scratch[:frames]
+    w = _input_history["w"]
+    for inp in extra_inputs:
+        if inp["stream"] is None or not drift_read(inp["ring"], inp, scratch, frames):
+            scratch.fill(0.0)
+        # Keep every history block-for-block in step with the main one.
+        inp["history"]["w"] = w
+        ring_write(inp["history"], scratch)
+        if not inp["muted"]:
+            scratch *= inp["gain"]
+            mix[:, 0] += scratch
+    ring_write(_input_history, indata[:, 0])
+    return mix
+
+def align_lag(ref, sig, max_lag):
+    """Signed lag (samples) of sig behind ref, and the peak-to-median ratio."""
+    nfft = 1 << (len(ref) + len(sig) - 1).bit_length()
+    corr = np.fft.irfft(np.fft.rfft(sig, nfft) * np.conj(np.fft.rfft(ref, nfft)), nfft)
+    corr = np.abs(np.concatenate((corr[-max_lag:], corr[:max_lag + 1])))
+    k    = int(np.argmax(corr))
+    return k - max_lag, float(corr[k] / (np.median(corr) + 1e-12))
+
+def align_extra_inputs(rate):
+    """Line every extra input up with the main input (runs on the supervisor)."""
+    ref = np.empty(ALIGN_WINDOW, dtype="float32")
+    sig = np.empty(ALIGN_WINDOW, dtype="float32")
+    w   = _input_history["w"]
+    if w < ALIGN_WINDOW:
+        return
+    ring_read(_input_history, w - ALIGN_WINDOW, ref)
+    if float(np.sqrt(np.mean(ref ** 2))) < ALIGN_MIN_RMS:
+        return
+    max_lag = min(ALIGN_MAX_LAG, ALIGN_WINDOW // 4)
+    for inp in extra_inputs:
+        if inp["stream"] is None:
+            continue
+        # mix_inputs keeps both histories at the same write position, so
+        # the two windows cover the same blocks.
+        ring_read(inp["history"], w - ALIGN_WINDOW, sig)
+        lag, peak = align_lag(ref, sig, max_lag)
+        if peak < ALIGN_MIN_PEAK or abs(lag) < 2:
+            continue
+        # lag > 0: the extra input hears things later, so read further ahead
+        # — but never past what is buffered; the main input is not delayed.
+        if lag > 0:
+            lag = min(lag, int(inp["fill"]) - BLOCK_SIZE * 2)
+            if lag < 2:
+                continue
+        inp["pos"]    += lag
+        inp["target"] -= lag
+        inp["fill"]   -= lag
+        inp["offset_ms"] += lag / rate * 1000.0
+        print(f"[mixer] {inp['name']}: aligned by {lag / rate * 1000.0:+.1f} ms")
+
+# ─── Audio — extra device management ──────────────────────────────────────────
+def _open_extra(item, rate):
+    """Open the stream of an extra output or input; on failure retry later."""
+    output = item in extra_outputs
+    stack  = ExitStack()
+    try:
+        item["stream"] = stack.enter_context(open_stream(
+            sd.OutputStream if output else sd.InputStream,
+            device=(resolve_output_index if output else resolve_input_index)(item["name"]),
+            channels=1,
+            samplerate=rate,
+            blocksize=BLOCK_SIZE,
+            latency="low",
+            dtype="float32",
+            callback=(partial(fanout_callback, dest=item) if output
+                      else partial(mixer_input_callback, inp=item)),
+        ))
+    except Exception as e:
+        stack.close()
+        item["stream"]   = None
+        item["retry_at"] = time.monotonic() + EXTRA_RETRY_S
+        print(f"[extra] {item['name']}: {e}")
+        return
+    if output:
+        reset_drift_reader(item, _fanout_ring)
+    else:
+        item["target"], item["offset_ms"] = float(MIXER_TARGET), 0.0
+        reset_drift_reader(item, item["ring"])
+    item["stack"], item["rate"] = stack, rate
+    print(f"[extra] + {item['name']}")
+
+def _close_extra(item):
+    if item["stack"] is not None:
+        item["stack"].close()
+    item["stack"] = item["stream"] = item["rate"] = None
+
+def _refresh_extra_flags():
+    global _fanout_active, _mixer_active
+    _fanout_active = any(d["stream"] is not None for d in extra_outputs)
+    _mixer_active  = any(i["stream"] is not None for i in extra_inputs)
+
+def sync_extras(rate):
+    """(Re)open extra devices that are closed, dead or at the wrong rate."""
+    with _extras_lock:
+        now = time.monotonic()
+        for item in extra_outputs + extra_inputs:
+            healthy = item["stream"] is not None and item["stream"].active
+            if healthy and item["rate"] == rate:
+                continue
+            _close_extra(item)
+            if now >= item["retry_at"]:
+                _open_extra(item, rate)
+        _refresh_extra_flags()
+
+def close_extras():
+    global _fanout_active, _mixer_active
+    with _extras_lock:
+        _fanout_active = _mixer_active = False
+        for item in extra_outputs + extra_inputs:
+            _close_extra(item)
+
+def _add_extra(items, item):
+    with _extras_lock:
+        items.append(item)
+    if running and _live_slot is not None:
+        sync_extras(_live_slot["rate"])
+    return item
+
+def add_extra_output(name, gain=1.0):
+    return _add_extra(extra_outputs, _new_destination(name, gain))
+
+def add_extra_input(name, gain=1.0, muted=False):
+    return _add_extra(extra_inputs, _new_input(name, gain, muted))
+
+def remove_extra(item):
+    with _extras_lock:
+        # Flags first: the callback must stop touching the item before it goes.
+        (extra_outputs if item in extra_outputs else extra_inputs).remove(item)
+        _refresh_extra_flags()
+        _close_extra(item)
+
+def retarget_extra(item, name):
+    with _extras_lock:
+        _close_extra(item)
+        item["name"], item["retry_at"] = name, 0.0
+        _refresh_extra_flags()
+    if running and _live_slot is not None:
+        sync_extras(_live_slot["rate"])
+
+# ─── Audio — recorder ─────────────────────────────────────────────────────────
+# Records the raw input and the processed output, one file per tap. The main
+# callback only appends each block to one ring per tap; all tap rings advance
+# together, so equal positions are the same instant and the files stay
+# sample-aligned. A writer thread wakes every REC_WRITE_INTERVAL and drains
+# the rings in chunks of up to REC_CHUNK_S with one bulk write per tap.
+REC_TAPS           = ("input", "output")
+REC_RING_S         = 10.0       # seconds of slack before the writer drops audio
+REC_CHUNK_S        = 1.0        # largest single write
+REC_WRITE_INTERVAL = 0.25
+REC_FORMATS        = (("wav", "flac") if importlib.util.find_spec("soundfile") is not None
+                      else ("wav",))
+
+record_format = "wav"
+_recorder     = None            # live recorder dict; the callback feeds its rings
+
+def _open_tap_file(path, rate, fmt):
+    """Open a mono recording file; returns (write(frames), close())."""
+    sf = _soundfile()
+    if sf is not None:
+        f = sf.SoundFile(path, "w", samplerate=rate, channels=1,
+                         subtype="PCM_24" if fmt == "flac" else "FLOAT")
+        return f.write, f.close
+    f = wave.open(path, "wb")
+    f.setnchannels(1)
+    f.setsampwidth(2)
+    f.setframerate(rate)
+    pcm = np.empty(int(REC_CHUNK_S * rate), dtype="<i2")
+    def write(frames):
+        out = pcm[:len(frames)] if len(frames) <= len(pcm) else np.empty(len(frames), dtype="<i2")
+        np.multiply(np.clip(frames, -1.0, 1.0), 32767.0, out=out, casting="unsafe")
+        f.writeframesraw(out.tobytes())
+    return write, f.close
+
+def _recorder_loop(rec):
+    rate  = rec["rate"]
+    chunk = np.empty(int(REC_CHUNK_S * rate), dtype="float32")
+    clock = rec["rings"][REC_TAPS[-1]]    # written last, so every tap is ready up to it
+    size  = clock["size"]
+    while True:
+        stopping = rec["stop"].wait(REC_WRITE_INTERVAL)
+        if _live_slot is not None and _live_slot["rate"] != rate:
+            print("[rec] sample rate changed, stopping")
+            stop_recording()
+            stopping = True
+        t0 = time.perf_counter()
+        written = 0
+        while True:
+            backlog = clock["w"] - rec["pos"]
+            if backlog > size - BLOCK_SIZE * 4:
+                # Writer fell a whole ring behind: skip ahead rather than
+                # read blocks the callback is overwriting.
+                skip = backlog - size // 2
+                rec["pos"] += skip
+                rec["dropped"] += skip
+                backlog -= skip
+                print(f"[rec] disk too slow, dropped {skip / rate * 1000:.0f} ms")
+            n = min(backlog, len(chunk))
+            if n <= 0:
+                break
+            for tap in REC_TAPS:
+                ring_read(rec["rings"][tap], rec["pos"], chunk[:n])
+                rec["files"][tap][0](chunk[:n])
+            rec["pos"] += n
+            written += n
+        dt = time.perf_counter() - t0
+        rec["frames"] += written
+        rec["bytes"]  += written * len(REC_TAPS) * rec["sample_bytes"]
+        rec["backlog_ms"] = (clock["w"] - rec["pos"]) / rate * 1000.0
+        rec["max_backlog_ms"] = max(rec["max_backlog_ms"], rec["backlog_ms"])
+        if written and dt > 0:
+            mbps = written * len(REC_TAPS) * rec["sample_bytes"] / dt / 1e6
+            rec["disk_mbps"] = mbps if rec["disk_mbps"] is None else 0.8 * rec["disk_mbps"] + 0.2 * mbps
+        if stopping:
+            break
+    for _, close in rec["files"].values():
+        close()
+    print(f"[rec] saved {rec['frames'] / rate:.1f} s to {rec['base']}_*.{rec['format']}"
+          f" (dropped {rec['dropped'] / rate * 1000:.0f} ms)")
+
+def start_recording(fmt=None):
+    """Start recording the live stream; returns the file base path or None."""
+    global _recorder
+    if _recorder is not None or not running or _live_slot is None:
+        return None
+    fmt  = fmt or record_format
+    fmt  = fmt if fmt in REC_FORMATS else "wav"
+    rate = _live_slot["rate"]
+    os.makedirs(RECORDINGS_DIR, exist_ok=True)
+    base = os.path.join(RECORDINGS_DIR, datetime.now().strftime("MicBoost_%Y%m%d-%H%M%S"))
+    rec = {"rate": rate, "format": fmt, "base": base, "stop": Event(),
+           "rings": {tap: new_ring(int(REC_RING_S * rate)) for tap in REC_TAPS},
+           "files": {}, "pos": 0, "frames": 0, "bytes": 0, "dropped": 0,
+           "sample_bytes": (4 if fmt == "wav" else 3) if _soundfile() is not None else 2,
+           "backlog_ms": 0.0, "max_backlog_ms": 0.0, "disk_mbps": None,
+           "started": time.monotonic()}
+    try:
+        for tap in REC_TAPS:
+            rec["files"][tap] = _open_tap_file(f"{base}_{tap}.{fmt}", rate, fmt)
+    except Exception as e:
+        for _, close in rec["files"].values():
+            close()
+        print(f"[rec] cannot open {base}: {e}")
+        return None
+    rec["thread"] = Thread(target=_recorder_loop, args=(rec,), daemon=True)
+    rec["thread"].start()
+    _recorder = rec
+    print(f"[rec] recording {', '.join(REC_TAPS)} to {base}_*.{fmt}")
+    return base
+
+def stop_recording(wait=False):
+    """Stop feeding the recorder; the writer drains what is left and closes."""
+    global _recorder
+    rec, _recorder = _recorder, None
+    if rec is None:
+        return
+    rec["stop"].set()
+    if wait:
+        rec["thread"].join(timeout=5.0)
+
+def recording():
+    return _recorder is not None
+
+def recorder_stats():
+    rec = _recorder
+    if rec is None:
+        return None
+    return {"seconds": time.monotonic() - rec["started"],
+            "disk_mbps": rec["disk_mbps"], "backlog_ms": rec["backlog_ms"],
+            "max_backlog_ms": rec["max_backlog_ms"],
+            "dropped_ms": rec["dropped"] / rec["rate"] * 1000.0,
+            "bytes": rec["bytes"]}
+
+# ─── Audio — instant replay ───────────────────────────────────────────────────
+# The last REPLAY_SECONDS of processed audio, always recorded into a ring
+# whose buffer is a file-backed np.memmap: the OS pages it out instead of it
+# sitting in the working set, and the callback writes it like any other
+# ring. Saving copies the ring out as at most two slices while the stream
+# keeps running; the oldest REPLAY_GUARD_S are left out because the callback
+# may be overwriting them during the copy (the ring holds that much extra).
+# Every ring gets its own temp file, so two instances never share one; on
+# POSIX the name is unlinked at once and the file goes with the mapping.
+REPLAY_SECONDS = 60
+REPLAY_GUARD_S = 0.5
+
+_replay       = None            # ring dict plus "rate", fed by the main callback
+_replay_files = []              # backing files still to delete (Windows: once unmapped)
+
+def _replay_buffer(frames):
+    """A float32 buffer backed by a temp file private to this ring."""
+    fd, path = tempfile.mkstemp(prefix="micboost_replay_", suffix=".f32")
+    os.close(fd)
+    try:
+        buf = np.memmap(path, dtype="float32", mode="w+", shape=(frames,))
+    except Exception:
+        os.remove(path)
+        raise
+    try:
+        os.remove(path)
+    except OSError:
+        _replay_files.append(path)   # still mapped: Windows cannot delete it yet
+    return buf
+
+def _remove_replay_files():
+    for path in list(_replay_files):
+        try:
+            os.remove(path)
+            _replay_files.remove(path)
+        except FileNotFoundError:
+            _replay_files.remove(path)
+        except OSError:
+            pass                     # a reader still holds the old mapping
+
+def ensure_replay(rate):
+    """Make sure the replay ring exists for this sample rate."""
+    global _replay
+    if _replay is not None and _replay["rate"] == rate:
+        return
+    _replay = None                   # unmap the old ring so its file can go
+    _remove_replay_files()
+    frames = int((REPLAY_SECONDS + REPLAY_GUARD_S) * rate)
+    try:
+        buf = _replay_buffer(frames)
+    except Exception as e:
+        print(f"[replay] memmap unavailable ({e}), using RAM")
+        buf = np.zeros(frames, dtype="float32")
+    _replay = {"buf": buf, "size": frames, "w": 0, "rate": rate}
+
+@atexit.register
+def _discard_replay():
+    global _replay
+    _replay = None
+    _remove_replay_files()
+
+def save_replay(seconds=REPLAY_SECONDS):
+    """Write the last `seconds` of processed audio to a WAV; returns the path."""
+    rp = _replay
+    if rp is None or rp["w"] == 0:
+        return None
+    rate, size, w = rp["rate"], rp["size"], rp["w"]
+    n = min(w, int(seconds * rate), size - int(REPLAY_GUARD_S * rate))
+    p = (w - n) % size
+    first = min(n, size - p)
+    os.makedirs(RECORDINGS_DIR, exist_ok=True)
+    path = os.path.join(RECORDINGS_DIR, datetime.now().strftime("Replay_%Y%m%d-%H%M%S.wav"))
+    write, close = _open_tap_file(path, rate, "wav")
+    try:
+        write(rp["buf"][p:p + first])
+        write(rp["buf"][:n - first])
+    finally:
+        close()
+    print(f"[replay] saved {n / rate:.1f} s to {path}")
+    return path
+
+# ─── Meters ───────────────────────────────────────────────────────────────────
+METER_MS = 50                   # window the output meters look back over
+
+def meters(ms=METER_MS):
+    """Peak and RMS of the last ms of processed output, read from the replay
+    ring so the callback does no metering work; None before any audio."""
+    rp = _replay
+    if rp is None or rp["w"] == 0 or not running:
+        return None
+    n = min(rp["w"], int(rp["rate"] * ms / 1000.0))
+    block = np.empty(n, dtype="float32")
+    ring_read(rp, rp["w"] - n, block)
+    peak = float(np.max(np.abs(block)))
+    rms  = float(np.sqrt(np.mean(np.square(block))))
+    db   = lambda v: round(20 * math.log10(v), 1) if v > 0 else None
+    return {"peak": peak, "rms": rms, "peak_db": db(peak), "rms_db": db(rms)}
+
+# ─── Process stats ────────────────────────────────────────────────────────────
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None if unknown."""
+    try:
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return kb / (1024 * 1024) if sys.platform == "darwin" else kb / 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t)]
+        c = Counters()
+        c.cb = ctypes.sizeof(c)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(c), c.cb)
+        return c.PeakWorkingSetSize / (1024 * 1024)
+    except Exception:
+        return None
+
+def report_startup(kind, t0):
+    """Log launch → first audio callback and peak memory, comparable across builds."""
+    first = first_callback_at()
+    ms    = (time.perf_counter() - t0 - (time.monotonic() - first)) * 1000.0
+    rss   = peak_rss_mb()
+    print(f"[startup] {kind}: first audio callback {ms:.0f} ms after launch"
+          + (f", peak RSS {rss:.1f} MB" if rss is not None else ""))
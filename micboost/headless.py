@@ -0,0 +1,259 @@
+"""Headless daemon: the audio engine without tkinter, pystray or PIL.
+
+    python mic_booster_pro.py --headless
+    python -m micboost headless
+
+Loads settings.json, opens the stream and keeps it running; edits to
+settings.json are picked up while it runs. Control it with
+signals (SIGINT/SIGTERM quit, SIGHUP reloads settings, SIGUSR1 toggles the
+monitor, SIGUSR2 toggles rage) or with commands on stdin, one per line:
+
+    gain <0-250> | rage [on|off] | monitor [on|off] | start | stop
+    profile <name> | profiles | reload | status | quit
+    chain add <input> -> <output> | chain <n> gain <0-250> | chain <n> remove
+
+With --control PORT (or "control" in settings.json) the same controls,
+plus meters and stats, are served by micboost.control.
+
+Extra chains listed under "chains" in settings.json (input, output, gain)
+run next to the main one, each on its own stream; "status" numbers them.
+"""
+
+import argparse
+import math
+import queue
+import signal
+import sys
+import time
+from threading import Thread
+
+from micboost import engine
+from micboost.dsp import RAGE_GAIN, slider_to_gain
+
+COMMANDS = ("gain", "rage", "monitor", "start", "stop", "profile", "profiles",
+            "reload", "chain", "status", "quit")
+
+_commands = queue.Queue()
+
+def apply_settings(cfg):
+    """Apply the engine parameters of a settings.json dict (not the devices)."""
+    slider = slider_to_gain(float(cfg.get("gain", 100)))
+    params = dict(
+        slider_gain=slider,
+        monitor_gain_value=slider_to_gain(cfg.get("monitor_gain", 100)),
+        monitor_tap=cfg.get("monitor_tap", "post"),
+        sidetone_gain=float(cfg.get("sidetone_gain", 50)) / 100.0,
+        input_gain=slider_to_gain(cfg.get("input_gain", 100)),
+        input_muted=bool(cfg.get("input_mute", False)),
+    )
+    if not engine.current_params()["rage_mode"]:
+        params["gain_value"] = slider
+    engine.update_params(**params)
+    if cfg.get("record_format") in engine.REC_FORMATS:
+        engine.record_format = cfg["record_format"]
+    saved_mon = cfg.get("monitor", "System Default")
+    engine.monitor_device = saved_mon if saved_mon in engine.outputs else "System Default"
+    saved_st = cfg.get("sidetone", "None")
+    engine.sidetone_device = saved_st if saved_st in engine.inputs else "None"
+
+def pick_devices(cfg):
+    saved_in = cfg.get("input", "")
+    choices  = engine.input_choices()
+    in_name  = saved_in if saved_in in choices else (choices[0] if choices else None)
+    out_name = engine.find_best_output(engine.outputs, cfg.get("output", ""))
+    return in_name, out_name
+
+def add_saved_extras(cfg):
+    for extra in cfg.get("extra_outputs", []):
+        if extra.get("name") in engine.outputs:
+            engine.add_extra_output(extra["name"], slider_to_gain(extra.get("gain", 100)))
+    for extra in cfg.get("extra_inputs", []):
+        if extra.get("name") in engine.inputs:
+            engine.add_extra_input(extra["name"], slider_to_gain(extra.get("gain", 100)),
+                                   extra.get("mute", False))
+
+def _on_off(arg, current):
+    """No argument toggles; otherwise on/off (or 1/0, true/false)."""
+    if not arg:
+        return not current
+    word = arg[0].lower()
+    if word in ("on", "1", "true"):
+        return True
+    if word in ("off", "0", "false"):
+        return False
+    raise ValueError(f"expected on or off, got {arg[0]!r}")
+
+def _slider_arg(arg):
+    try:
+        v = float(arg[0]) if len(arg) == 1 else math.nan
+    except ValueError:
+        v = math.nan
+    if not 0.0 <= v <= 250.0:
+        raise ValueError(f"expected gain <0-250>, got {' '.join(arg)!r}")
+    return v
+
+def _chain_command(arg):
+    usage = "expected chain add <input> -> <output> | chain <n> gain <0-250> | chain <n> remove"
+    if arg[:1] == ["add"]:
+        names = " ".join(arg[1:]).split(" -> ")
+        if len(names) != 2:
+            raise ValueError(usage)
+        if names[0] not in engine.input_choices():
+            raise ValueError(f"unknown input {names[0]!r}")
+        if names[1] not in engine.outputs:
+            raise ValueError(f"unknown output {names[1]!r}")
+        engine.add_chain(*names)
+        return
+    if not arg or not arg[0].isdigit() or int(arg[0]) >= len(engine.chains):
+        raise ValueError(f"no chain {' '.join(arg[:1])!r}; status lists them" if arg else usage)
+    chain = engine.chains[int(arg[0])]
+    if arg[1:2] == ["gain"]:
+        chain.set_gain(_slider_arg(arg[2:]))
+    elif arg[1:] == ["remove"]:
+        engine.remove_chain(chain)
+    else:
+        raise ValueError(usage)
+
+def run_command(line, devices):
+    """Execute one control command; returns False when the daemon should exit."""
+    parts = line.split()
+    if not parts:
+        return True
+    cmd, arg = parts[0].lower(), parts[1:]
+    if cmd == "quit":
+        return False
+    if cmd == "gain":
+        gain = slider_to_gain(_slider_arg(arg))
+        if engine.current_params()["rage_mode"]:
+            engine.update_params(slider_gain=gain)    # takes effect when rage ends
+        else:
+            engine.update_params(gain_value=gain, slider_gain=gain)
+    elif cmd == "rage":
+        params = engine.current_params()
+        on = _on_off(arg, params["rage_mode"])
+        engine.update_params(rage_mode=on, gain_value=RAGE_GAIN if on else params["slider_gain"])
+    elif cmd == "monitor":
+        want = _on_off(arg, engine.monitoring)
+        if want and not engine.monitoring:
+            engine.start_monitor()
+        elif not want and engine.monitoring:
+            engine.stop_monitor()
+    elif cmd == "start":
+        engine.start(*devices)
+    elif cmd == "stop":
+        engine.stop()
+    elif cmd == "profile":
+        if not arg:
+            raise ValueError("expected profile <name>")
+        name = " ".join(arg)
+        p = engine.load_profiles().get(name)
+        if p is None:
+            print(f"[headless] no profile {name!r}")
+            return True
+        engine.apply_profile(p)
+        print(f"[headless] profile {name}")
+    elif cmd == "profiles":
+        print(f"[headless] profiles: {', '.join(sorted(engine.load_profiles())) or '(none)'}")
+        return True
+    elif cmd == "reload":
+        cfg = engine.load_settings()
+        apply_settings(cfg)
+        engine.apply_profile(cfg)
+    elif cmd == "chain":
+        _chain_command(arg)
+    elif cmd != "status":
+        print(f"[headless] unknown command {line!r}; try: {', '.join(COMMANDS)}")
+        return True
+    print(f"[headless] {'LIVE' if engine.running else 'IDLE'}  gain ×{engine.gain_value:.2f}"
+          f"{'  RAGE' if engine.rage_mode else ''}"
+          f"  monitor {'on' if engine.monitoring else 'off'}")
+    for i, chain in enumerate(engine.chains):
+        print(f"[headless]   chain {i}: {chain.input_device} → {chain.output_device}"
+              f"  gain ×{chain.gain:.2f}  peak {chain.peak:.2f}"
+              f"  recoveries {chain.recovery_stats['count']}")
+    return True
+
+def _stdin_loop():
+    for line in sys.stdin:
+        _commands.put(line.strip())
+    # stdin closed (e.g. started from a service manager): keep running.
+
+def _install_signals():
+    def handler(cmd):
+        return lambda signum, frame: _commands.put(cmd)
+    signal.signal(signal.SIGINT,  handler("quit"))
+    signal.signal(signal.SIGTERM, handler("quit"))
+    for name, cmd in (("SIGHUP", "reload"), ("SIGUSR1", "monitor"), ("SIGUSR2", "rage")):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), handler(cmd))
+
+def main(argv=None, t0=None):
+    t0 = time.perf_counter() if t0 is None else t0
+    parser = argparse.ArgumentParser(prog="micboost --headless")
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--no-stdin", action="store_true",
+                        help="ignore stdin; control with signals only")
+    parser.add_argument("--control", metavar="PORT|unix:PATH",
+                        help='serve the local control API (default: "control" in settings.json)')
+    args = parser.parse_args(argv)
+
+    engine.hooks.update(
+        status=lambda state: print(f"[headless] {state}"),
+        error=lambda msg: print(f"[headless] error: {msg}"),
+    )
+    err = engine.scan_devices()
+    if err:
+        print(f"[headless] {err}")
+        return 1
+    cfg = engine.load_settings()
+    for path in cfg.get("input_files", []):
+        engine.add_file_input(path)
+    apply_settings(cfg)
+    devices = pick_devices(cfg)
+    if None in devices:
+        print("[headless] no usable input/output device")
+        return 1
+    def on_devices(found_in, found_out):
+        engine.inputs, engine.outputs = found_in, found_out
+        if engine.running and engine.input_device in engine.input_choices() \
+                and engine.output_device in found_out:
+            engine.reconnect_audio()
+    engine.hooks["devices"] = on_devices
+    engine.hooks["settings"] = lambda cfg: _commands.put("reload")
+    engine.start_device_watcher()
+    engine.start_settings_watcher()
+    add_saved_extras(cfg)
+    engine.start(*devices)
+    print(f"[headless] {devices[0]} → {devices[1]}")
+    engine.add_saved_chains(cfg)
+    for chain in engine.chains:
+        print(f"[headless] chain {chain.input_device} → {chain.output_device}")
+
+    spec = args.control or cfg.get("control")
+    if spec:
+        from micboost import control
+        control.serve(spec)
+    _install_signals()
+    if not args.no_stdin:
+        Thread(target=_stdin_loop, daemon=True).start()
+
+    ready_reported = False
+    while True:
+        try:
+            line = _commands.get(timeout=0.1)
+        except queue.Empty:
+            line = None
+        if not ready_reported and engine.first_callback_at() is not None:
+            ready_reported = True
+            engine.report_startup("headless", t0)
+        if line is None:
+            continue
+        try:
+            if not run_command(line, devices):
+                break
+        except Exception as e:
+            print(f"[headless] {line!r} failed: {e}")
+    engine.stop()
+    engine.stop_chains()
+    engine.stop_recording(wait=True)
+    return 0
@@ -0,0 +1,120 @@
+"""Faster-than-real-time render engine for the live processing chain.
+
+Drives render_block — the code audio_callback runs — from an array or a file
+as fast as the CPU allows, in BLOCK_SIZE blocks with the same fade state the
+stream slot carries. Parameter changes are scheduled at sample offsets:
+
+    render(x, gain=1.0, schedule=[(48000, "gain", 6.0), (96000, "fade", 0.0)])
+"""
+
+import time
+
+import numpy as np
+
+from micboost.batch import same_file
+from micboost.dsp import BLOCK_SIZE, SAMPLE_RATE, fade_step, render_block
+
+try:
+    import soundfile as sf
+except Exception:
+    sf = None
+
+RENDER_CHUNK_BLOCKS = 512   # blocks read and written per step when rendering files
+
+def new_renderer(gain=1.0, schedule=(), samplerate=SAMPLE_RATE, level=1.0,
+                 block_size=BLOCK_SIZE):
+    """Render state: gain, fade envelope, pending events and sample position.
+
+    schedule holds (sample_offset, kind, value) events, kind being "gain"
+    (set the gain) or "fade" (start a crossfade to level value, as a hot
+    switch does). Events take effect exactly at their offset; a gain change
+    is ramped from there to the end of its block, as the live stream ramps
+    one across the block it lands in.
+    """
+    return {"gain": float(gain), "samplerate": samplerate, "block": block_size,
+            "fade": {"level": level, "target": level, "step": fade_step(samplerate),
+                     "gain": float(gain)},
+            "events": sorted(schedule, key=lambda e: e[0]), "pos": 0, "blocks": 0}
+
+def _apply_event(r, kind, value):
+    if kind == "gain":
+        r["gain"] = float(value)
+    elif kind == "fade":
+        r["fade"]["target"] = float(value)
+    else:
+        raise ValueError(f"unknown event kind {kind!r}")
+
+def render_into(r, data, out):
+    """Render data into out (same shape), block by block, advancing r.
+
+    Blocks are cut at absolute multiples of the block size, so feeding a
+    signal in several calls gives the same result as feeding it at once as
+    long as every call but the last is a whole number of blocks.
+    """
+    n, bs, events = len(data), r["block"], r["events"]
+    start = 0
+    while start < n:
+        end = min(start + bs - (r["pos"] + start) % bs, n)
+        seg = start
+        # An event inside this block splits it; the fade ramp and the clip
+        # are per-sample, so the pieces render exactly like one block would
+        # with the change landing on that sample.
+        while events and events[0][0] < r["pos"] + end:
+            cut = max(events[0][0] - r["pos"], seg)
+            if cut > seg:
+                out[seg:cut] = render_block(data[seg:cut], r["gain"], r["fade"])
+                seg = cut
+            _apply_event(r, *events.pop(0)[1:])
+        if end > seg:
+            out[seg:end] = render_block(data[seg:end], r["gain"], r["fade"])
+        r["blocks"] += 1
+        start = end
+    r["pos"] += n
+    return out
+
+def render(data, **kwargs):
+    """Render a whole array; returns (output, seconds spent)."""
+    data = np.asarray(data, dtype="float32")
+    r    = new_renderer(**kwargs)
+    out  = np.empty_like(data)
+    t0   = time.perf_counter()
+    render_into(r, data, out)
+    return out, time.perf_counter() - t0
+
+def _require_soundfile():
+    if sf is None:
+        raise RuntimeError("soundfile is required: pip install soundfile")
+
+def file_samplerate(path):
+    """Sample rate of an audio file, e.g. to turn seconds into event offsets."""
+    _require_soundfile()
+    return sf.info(path).samplerate
+
+def render_file(src, dst, **kwargs):
+    """Stream a file through the engine; returns (frames, samplerate, seconds).
+
+    Raises RuntimeError when dst is src or not a format soundfile can write.
+    """
+    _require_soundfile()
+    if same_file(src, dst):
+        raise RuntimeError(f"{dst}: output would overwrite the input")
+    t0 = time.perf_counter()
+    with sf.SoundFile(src) as fin:
+        kwargs.setdefault("samplerate", fin.samplerate)
+        r = new_renderer(**kwargs)
+        subtype = "FLOAT" if dst.lower().endswith(".wav") else None
+        try:
+            fout = sf.SoundFile(dst, "w", samplerate=fin.samplerate, channels=fin.channels,
+                                subtype=subtype)
+        except (TypeError, ValueError) as e:     # soundfile's unknown format / subtype
+            raise RuntimeError(f"cannot write {dst}: {e}") from None
+        with fout:
+            buf = np.empty((RENDER_CHUNK_BLOCKS * r["block"], fin.channels), dtype="float32")
+            res = np.empty_like(buf)
+            while True:
+                block = fin.read(out=buf)
+                if not len(block):
+                    break
+                fout.write(render_into(r, block, res[:len(block)]))
+        rate = fin.samplerate
+    return r["pos"], rate, time.perf_counter() - t0